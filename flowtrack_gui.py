@@ -10,8 +10,19 @@ import webbrowser
 import time
 from pydrive2.auth import GoogleAuth
 from pydrive2.drive import GoogleDrive
+from googleapiclient.http import MediaIoBaseDownload
 import threading
 import sys
+import hashlib
+import zlib
+import struct
+import mmap
+import heapq
+import bisect
+import ntpath
+from array import array
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -25,34 +36,262 @@ def ensure_client_secrets():
 
 # === Constants & Globals ===
 CONFIG_FILE = "fl_config.json"
+DEFAULT_LIBRARY_ROOT = "backups"
+LIBRARY_INDEX_FILE = ".flowtrack_index.json"
+LIBRARY_INDEX_SETTLE_NS = 3 * 10**9
+project_roots = {}
+library_index_shards = {}
+dirty_index_shards = set()
+library_index_lock = threading.RLock()
+moving_projects = set()
+offline_roots = set()
+app_config = None
 upload_mode = False
 selected_beats_for_upload = set()
 selected_folder = None
 selected_version = None
 beats_data_cache = {}
+NOTE_CACHE_SIZE = 256
+NOTE_PREFETCH_RADIUS = 2
+note_cache = OrderedDict()
+note_cache_lock = threading.Lock()
+beats_search_job = None
+beats_search_generation = 0
+BUNDLE_EXTENSION = ".ftbundle"
+BUNDLE_MAGIC = b"FLOWTRACK-BUNDLE-1\n"
+BUNDLE_TRAILER = struct.Struct(">Q8s")
+BUNDLE_TRAILER_TAG = b"FTINDEX1"
+BUNDLE_BLOCK_SIZE = 4 * 1024 * 1024
+BUNDLE_COMPRESSION_LEVEL = 6
+BUNDLE_WORKERS = os.cpu_count() or 4
+CHECKSUM_CATALOG_FILE = "checksums.json"
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+SCRUB_WORKERS = min(4, os.cpu_count() or 1)
+SCRUB_RATE_BYTES = 32 * 1024 * 1024
+SCRUB_INTERVAL_MS = 30 * 60 * 1000
+SCRUB_FULL_PASS_SECONDS = 7 * 24 * 3600
+checksum_catalog = None
+checksum_catalog_lock = threading.RLock()
+scrub_running = threading.Lock()
+DRIVE_MANIFEST_FILE = "drive_manifest.json"
+DRIVE_ROOT_TITLE = "FLowTrack Projects"
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+DRIVE_CREDENTIALS_FILE = "drive_credentials.json"
+DRIVE_TOKEN_REFRESH_MARGIN = 5 * 60
+DRIVE_WORKERS = 4
+DRIVE_BATCH_LIMIT = 100
+DRIVE_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+drive_session = None
+drive_session_lock = threading.RLock()
+drive_http_local = threading.local()
+SAMPLE_INDEX_FILE = "sample_index.json"
+SAMPLE_EXTENSIONS = (".wav", ".aif", ".aiff", ".flac", ".mp3", ".ogg", ".wv", ".rx2")
+SAMPLES_DIR = "samples"
+FLP_EVENT_SAMPLE_FILENAME = 196
+sample_index = None
+sample_lookup = {}
+sample_index_lock = threading.RLock()
+OVERWRITTEN_BACKUP_PATTERN = re.compile(r"^Backup.*\(overwritten at \d{1,2}h\d{2}\)")
+STORAGE_USAGE_FILE = "storage_usage.json"
+RETENTION_KEEP_VERSIONS = 10
+STORAGE_TOP_PROJECTS = 10
+storage_usage = None
+NOTES_JOURNAL_FILE = "notes.journal"
+NOTES_COMPACT_MIN_BYTES = 64 * 1024
+notes_journal_index = {}
+notes_journal_lock = threading.RLock()
 
 # === Helper/Data Functions ===
+def load_config():
+    global app_config
+    if app_config is None:
+        app_config = {}
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, "r") as f:
+                app_config = json.load(f)
+    return app_config
+
+def save_config(**changes):
+    config = load_config()
+    config.update(changes)
+    with open(CONFIG_FILE, "w") as f:
+        json.dump(config, f)
+
 def get_fl_studio_path():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "r") as f:
-            config = json.load(f)
-            fl_path = config.get("fl_studio_path", "")
-            if os.path.exists(fl_path):
-                return fl_path
+    fl_path = load_config().get("fl_studio_path", "")
+    if os.path.exists(fl_path):
+        return fl_path
     return None
 
 def prompt_and_save_fl_path():
     fl_path = filedialog.askopenfilename(title="Select FL Studio Executable", filetypes=[("Executable Files", "*.exe")])
     if fl_path:
-        with open(CONFIG_FILE, "w") as f:
-            json.dump({"fl_studio_path": fl_path}, f)
+        save_config(fl_studio_path=fl_path)
         return fl_path
     return None
 
+# === Library Roots ===
+# Projects can live under several library roots (fl_config.json "library_roots", first is
+# where new projects go). Each root keeps its own shard of the index in
+# .flowtrack_index.json: its project folders and, per project, the .flp listing along with
+# the folder mtime it was taken at. project_roots is the unified beat -> root view; when
+# two roots hold the same name, the earlier root wins. Only the primary root is ever
+# created; another root that is missing or unreadable (an unplugged drive, an unmounted
+# mount point) is left alone and listed in offline_roots until it comes back. A project
+# that is not in the index has no path (it may sit on an offline root); only creating a
+# project, through new_project_path, places it in the primary root.
+def get_library_roots():
+    return load_config().get("library_roots") or [DEFAULT_LIBRARY_ROOT]
+
+def get_project_root(beat_folder):
+    with library_index_lock:
+        root = project_roots.get(beat_folder)
+    if root is None:
+        raise FileNotFoundError(f"Project '{beat_folder}' is not in any connected library.")
+    return root
+
+def beat_path(beat_folder, *parts):
+    return os.path.join(get_project_root(beat_folder), beat_folder, *parts)
+
+def new_project_path(beat_folder, *parts):
+    with library_index_lock:
+        root = project_roots.setdefault(beat_folder, get_library_roots()[0])
+    return os.path.join(root, beat_folder, *parts)
+
+def _load_index_shard(root):
+    shard = library_index_shards.get(root)
+    if shard is None:
+        shard = {"projects": {}}
+        try:
+            with open(os.path.join(root, LIBRARY_INDEX_FILE), "r") as f:
+                shard = json.load(f)
+        except (OSError, ValueError):
+            pass
+        library_index_shards[root] = shard
+    return shard
+
+def flush_library_index():
+    with library_index_lock:
+        dirty = list(dirty_index_shards)
+        dirty_index_shards.clear()
+        for root in dirty:
+            try:
+                if os.path.isdir(root):
+                    write_json_atomic(os.path.join(root, LIBRARY_INDEX_FILE), library_index_shards[root])
+            except OSError:
+                dirty_index_shards.add(root)
+
+def _scan_library_root(root, create=False):
+    try:
+        if create:
+            os.makedirs(root, exist_ok=True)
+        with os.scandir(root) as entries:
+            names = [e.name for e in entries if e.is_dir() and not e.name.startswith(".")]
+    except OSError:
+        return None
+    with library_index_lock:
+        shard = _load_index_shard(root)
+        if set(names) != set(shard["projects"]):
+            shard["projects"] = {name: shard["projects"].get(name, {}) for name in names}
+            dirty_index_shards.add(root)
+    return names
+
+def scan_library_roots():
+    roots = get_library_roots()
+    creates = [True] + [False] * (len(roots) - 1)
+    if len(roots) == 1:
+        scanned = [_scan_library_root(roots[0], create=True)]
+    else:
+        with ThreadPoolExecutor(max_workers=len(roots)) as pool:
+            scanned = list(pool.map(_scan_library_root, roots, creates))
+    unified = {}
+    for root, names in zip(roots, scanned):
+        for name in names or ():
+            unified.setdefault(name, root)
+    with library_index_lock:
+        offline_roots.clear()
+        offline_roots.update(root for root, names in zip(roots, scanned) if names is None)
+        project_roots.clear()
+        project_roots.update(unified)
+    flush_library_index()
+    return unified
+
+def _list_project_flps(beat_folder):
+    root = get_project_root(beat_folder)
+    folder_path = os.path.join(root, beat_folder)
+    mtime = os.stat(folder_path).st_mtime_ns
+    with library_index_lock:
+        entry = _load_index_shard(root)["projects"].get(beat_folder)
+        if entry and entry.get("mtime") == mtime:
+            return list(entry["versions"])
+    flps = [f for f in os.listdir(folder_path) if f.endswith(".flp")]
+    # External drives often have coarse mtimes, so a listing taken right after a change
+    # is not trusted for reuse.
+    if time.time_ns() - mtime > LIBRARY_INDEX_SETTLE_NS:
+        with library_index_lock:
+            _load_index_shard(root)["projects"][beat_folder] = {"mtime": mtime, "versions": flps}
+            dirty_index_shards.add(root)
+    return flps
+
+def project_busy(beat_folder):
+    if beat_folder in moving_projects:
+        messagebox.showinfo("Project Busy", f"'{beat_folder}' is being moved to another library. Try again when it finishes.")
+        return True
+    return False
+
+def check_not_moving(beat_folder):
+    # For background tasks, which report errors themselves instead of showing a dialog.
+    if beat_folder in moving_projects:
+        raise RuntimeError(f"'{beat_folder}' is being moved to another library. Try again when it finishes.")
+
+def move_project(beat_folder, target_root):
+    source_root = get_project_root(beat_folder)
+    if os.path.abspath(source_root) == os.path.abspath(target_root):
+        return
+    source = os.path.join(source_root, beat_folder)
+    target = os.path.join(target_root, beat_folder)
+    if not os.path.isdir(target_root):
+        raise FileNotFoundError(f"Library '{target_root}' is not connected.")
+    if os.path.exists(target):
+        raise FileExistsError(f"'{target}' already exists.")
+    moving_projects.add(beat_folder)
+    try:
+        same_device = os.stat(source).st_dev == os.stat(target_root).st_dev
+        if same_device:
+            os.rename(source, target)
+        else:
+            # Copy into a hidden staging folder, check it, then swap it in; the original
+            # stays readable until the copy is known to be complete.
+            staging = os.path.join(target_root, f".moving-{beat_folder}")
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+            shutil.copytree(source, staging)
+            for root, _, files in os.walk(source):
+                for name in files:
+                    src_file = os.path.join(root, name)
+                    copied = os.path.join(staging, os.path.relpath(src_file, source))
+                    if not os.path.exists(copied) or os.path.getsize(copied) != os.path.getsize(src_file):
+                        raise IOError(f"Copy of '{src_file}' is incomplete.")
+            os.rename(staging, target)
+        with library_index_lock:
+            entry = _load_index_shard(source_root)["projects"].pop(beat_folder, {})
+            _load_index_shard(target_root)["projects"][beat_folder] = entry
+            dirty_index_shards.update((source_root, target_root))
+            project_roots[beat_folder] = target_root
+        flush_library_index()
+        if not same_device:
+            # The index already points at the new copy. Hide the old one before deleting it
+            # so a partial delete can never be picked up by a later scan.
+            retired = os.path.join(source_root, f".moved-{beat_folder}")
+            if os.path.exists(retired):
+                shutil.rmtree(retired)
+            os.rename(source, retired)
+            shutil.rmtree(retired)
+    finally:
+        moving_projects.discard(beat_folder)
+
 def get_beat_folders():
-    if not os.path.exists("backups"):
-        os.makedirs("backups")
-    return [folder for folder in os.listdir("backups") if os.path.isdir(os.path.join("backups", folder))]
+    return list(scan_library_roots())
 
 def extract_timestamp(filename):
     match = re.search(r"_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2})", filename)
@@ -64,8 +303,7 @@ def extract_timestamp(filename):
     return datetime.min
 
 def get_versions_for_beat(beat_folder):
-    folder_path = os.path.join("backups", beat_folder)
-    flps = [f for f in os.listdir(folder_path) if f.endswith(".flp")]
+    flps = _list_project_flps(beat_folder)
     present_version = None
     timestamped_versions = []
     for f in flps:
@@ -79,21 +317,62 @@ def get_versions_for_beat(beat_folder):
     else:
         return timestamped_versions
 
+def notes_journal_enabled():
+    return load_config().get("notes_store") == "journal"
+
 def get_notes_for_version(beat_folder, version_file):
+    if notes_journal_enabled():
+        note = read_journal_note(beat_folder, version_file)
+        if note is not None:
+            return note
     note_file = version_file.replace(".flp", ".txt")
-    note_path = os.path.join("backups", beat_folder, note_file)
+    note_path = beat_path(beat_folder, note_file)
     if os.path.exists(note_path):
         with open(note_path, "r") as f:
             return f.read()
     return ""
 
+def get_all_notes_for_beat(beat_folder):
+    folder_path = beat_path(beat_folder)
+    notes = {}
+    # Loose .txt notes can still appear in journal mode (Drive downloads), so read both.
+    for f in os.listdir(folder_path):
+        if f.endswith(".txt"):
+            with open(os.path.join(folder_path, f), "r") as note_f:
+                notes[f[:-len(".txt")] + ".flp"] = note_f.read()
+    if notes_journal_enabled():
+        notes.update(read_journal_notes(beat_folder))
+    return notes
+
+def set_notes_for_version(beat_folder, version_file, notes):
+    invalidate_note_cache(beat_folder, version_file)
+    note_path = beat_path(beat_folder, version_file.replace(".flp", ".txt"))
+    if notes_journal_enabled():
+        append_journal_records(beat_folder, [{"v": version_file, "n": notes}])
+        if os.path.exists(note_path):
+            os.remove(note_path)
+        return
+    with open(note_path, "w") as f:
+        f.write(notes)
+
+def delete_notes_for_version(beat_folder, version_file):
+    invalidate_note_cache(beat_folder, version_file)
+    note_path = beat_path(beat_folder, version_file.replace(".flp", ".txt"))
+    if os.path.exists(note_path):
+        os.remove(note_path)
+    if os.path.exists(beat_path(beat_folder, NOTES_JOURNAL_FILE)):
+        append_journal_records(beat_folder, [{"v": version_file, "d": True}])
+
 def open_in_fl(folder, version_file):
+    # FL Studio saves straight over the present version, so not while it is being moved.
+    if project_busy(folder):
+        return
     fl_path = get_fl_studio_path()
     if not fl_path:
         fl_path = prompt_and_save_fl_path()
         if not fl_path:
             return
-    flp_path = os.path.abspath(os.path.join("backups", folder, version_file))
+    flp_path = os.path.abspath(beat_path(folder, version_file))
     if os.path.exists(flp_path):
         subprocess.Popen([fl_path, flp_path])
 
@@ -106,35 +385,33 @@ def create_new_project():
         fl_path = prompt_and_save_fl_path()
         if not fl_path:
             return
-    beat_folder = os.path.join("backups", project_name)
+    beat_folder = new_project_path(project_name)
     os.makedirs(beat_folder, exist_ok=True)
     new_flp_path = os.path.join(beat_folder, f"{project_name}.flp")
     shutil.copy2(resource_path("empty_template.flp"), new_flp_path)
+    record_checksum(project_name, f"{project_name}.flp")
     if messagebox.askyesno("Add Notes?", "Do you want to add notes for this new project?"):
         def save_notes(notes):
-            note_path = os.path.join(beat_folder, f"{project_name}.txt")
-            with open(note_path, "w") as f:
-                f.write(notes if notes else "(No notes)")
+            set_notes_for_version(project_name, f"{project_name}.flp", notes if notes else "(No notes)")
             refresh_all()
         themed_note_popup(save_notes)
     subprocess.Popen([fl_path, os.path.abspath(new_flp_path)])
     refresh_all()
 
 def create_new_backup(folder):
-    if not folder:
+    if not folder or project_busy(folder):
         return
-    present_flp = os.path.join("backups", folder, f"{folder}.flp")
+    present_flp = beat_path(folder, f"{folder}.flp")
     if not os.path.exists(present_flp):
         messagebox.showerror("Error", "No present version found to back up.")
         return
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
     backup_name = f"{folder}_{timestamp}.flp"
-    backup_path = os.path.join("backups", folder, backup_name)
+    backup_path = beat_path(folder, backup_name)
     shutil.copy2(present_flp, backup_path)
+    record_checksum(folder, backup_name)
     def save_notes(notes):
-        note_path = os.path.join("backups", folder, f"{folder}_{timestamp}.txt")
-        with open(note_path, "w") as f:
-            f.write(notes if notes else "")
+        set_notes_for_version(folder, backup_name, notes if notes else "")
         refresh_all()
     if messagebox.askyesno("Add Notes?", "Do you want to add notes for this backup version?"):
         themed_note_popup(save_notes)
@@ -158,70 +435,25 @@ def upload_selected_to_gdrive():
     upload_selected_btn.configure(state="disabled", text="Connecting to Drive...")
     def do_drive_folder():
         try:
-            ensure_client_secrets()
-            gauth = GoogleAuth()
-            gauth.LocalWebserverAuth()
-            drive = GoogleDrive(gauth)
-            folder_list = drive.ListFile({
-                'q': "mimeType='application/vnd.google-apps.folder' and trashed=false and title='FLowTrack Projects'"
-            }).GetList()
-            if folder_list:
-                flowtrack_folder = folder_list[0]
-            else:
-                flowtrack_folder = drive.CreateFile({
-                    'title': 'FLowTrack Projects',
-                    'mimeType': 'application/vnd.google-apps.folder'
-                })
-                flowtrack_folder.Upload()
-            flowtrack_folder_id = flowtrack_folder['id']
-            all_files = []
-            for beat_folder in selected_beats_for_upload:
-                local_folder = os.path.join("backups", beat_folder)
-                for root, _, files in os.walk(local_folder):
-                    for file in files:
-                        if re.match(r"^Backup.*\(overwritten at \d{1,2}h\d{2}\)", file):
-                            continue
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, local_folder)
-                        all_files.append((beat_folder, file_path, rel_path))
-            total_files = len(all_files)
+            drive = get_drive()
             app.after(0, lambda: (
                 progress_bar.set(0),
                 progress_bar.pack(pady=(0, 10)),
-                upload_selected_btn.configure(text=f"Uploading: 0/{total_files}")
+                upload_selected_btn.configure(text="Comparing with Drive...")
             ))
-            uploaded = 0
-            for beat_folder, file_path, rel_path in all_files:
-                subfolder_list = drive.ListFile({
-                    'q': f"'{flowtrack_folder_id}' in parents and trashed=false and title='{beat_folder}' and mimeType='application/vnd.google-apps.folder'"
-                }).GetList()
-                if subfolder_list:
-                    beat_drive_folder = subfolder_list[0]
-                else:
-                    beat_drive_folder = drive.CreateFile({
-                        'title': beat_folder,
-                        'parents': [{'id': flowtrack_folder_id}],
-                        'mimeType': 'application/vnd.google-apps.folder'
-                    })
-                    beat_drive_folder.Upload()
-                beat_drive_folder_id = beat_drive_folder['id']
-                gfile = drive.CreateFile({
-                    'title': rel_path,
-                    'parents': [{'id': beat_drive_folder_id}]
-                })
-                gfile.SetContentFile(file_path)
-                gfile.Upload()
-                uploaded += 1
-                app.after(0, lambda u=uploaded: (
-                    progress_bar.set(u / total_files),
-                    upload_selected_btn.configure(text=f"Uploading: {u}/{total_files}")
+            def on_progress(done, total):
+                app.after(0, lambda: (
+                    progress_bar.set(done / total),
+                    upload_selected_btn.configure(text=f"Uploading: {done}/{total}")
                 ))
+            plan = sync_with_drive(drive, selected_beats_for_upload, pull=False, progress=on_progress)
             app.after(0, lambda: (
                 progress_bar.set(1),
-                messagebox.showinfo("Upload Complete", "All selected beats have been uploaded!"),
+                messagebox.showinfo("Upload Complete", describe_sync_plan(plan)),
                 progress_bar.pack_forget()
             ))
         except Exception as e:
+            reset_drive_session()
             app.after(0, lambda err=e: (
                 messagebox.showerror("Google Drive Error", str(err)),
                 progress_bar.pack_forget()
@@ -231,32 +463,79 @@ def upload_selected_to_gdrive():
             app.after(0, exit_upload_mode)
     threading.Thread(target=do_drive_folder, daemon=True).start()
 
+# Per beat: interned version names plus parallel array columns. Note text is never held
+# here; it is read on demand through the note cache below.
 def load_all_beats_data():
     data = {}
+    with checksum_catalog_lock:
+        usage_projects = load_storage_usage()["projects"]
     for beat in get_beat_folders():
-        versions = get_versions_for_beat(beat)
-        notes = {}
+        beat = sys.intern(beat)
+        versions = tuple(sys.intern(v) for v in get_versions_for_beat(beat))
+        known_sizes = usage_projects.get(beat, {}).get("versions", {})
+        timestamps = array("d")
+        sizes = array("q")
         for v in versions:
-            notes[v.lower()] = get_notes_for_version(beat, v).lower()
-        present_beat_file = f"{beat}.flp"
-        notes[present_beat_file.lower()] = get_notes_for_version(beat, present_beat_file).lower()
-        data[beat] = {
-            "versions": [v.lower() for v in versions] + [present_beat_file.lower()],
-            "notes": notes,
-        }
+            version_path = beat_path(beat, v)
+            if v == f"{beat}.flp":
+                timestamps.append(os.path.getmtime(version_path))
+            else:
+                dt = extract_timestamp(v)
+                timestamps.append(dt.timestamp() if dt != datetime.min else 0.0)
+            sizes.append(known_sizes[v][0] if v in known_sizes else os.path.getsize(version_path))
+        data[beat] = {"versions": versions, "timestamps": timestamps, "sizes": sizes}
+    flush_library_index()
     return data
 
-def filter_beats(query):
+def get_cached_note(beat_folder, version_file):
+    key = (beat_folder, version_file)
+    with note_cache_lock:
+        if key in note_cache:
+            note_cache.move_to_end(key)
+            return note_cache[key]
+    note = get_notes_for_version(beat_folder, version_file)
+    with note_cache_lock:
+        note_cache[key] = note
+        while len(note_cache) > NOTE_CACHE_SIZE:
+            note_cache.popitem(last=False)
+    return note
+
+def invalidate_note_cache(beat_folder=None, version_file=None):
+    with note_cache_lock:
+        if beat_folder is None:
+            note_cache.clear()
+        elif version_file is not None:
+            note_cache.pop((beat_folder, version_file), None)
+        else:
+            for key in [k for k in note_cache if k[0] == beat_folder]:
+                del note_cache[key]
+
+def prefetch_adjacent_notes(beat_folder, version_file):
+    info = beats_data_cache.get(beat_folder)
+    if not info or version_file not in info["versions"]:
+        return
+    i = info["versions"].index(version_file)
+    neighbours = info["versions"][max(0, i - NOTE_PREFETCH_RADIUS):i + NOTE_PREFETCH_RADIUS + 1]
+    def prefetch_task():
+        for v in neighbours:
+            get_cached_note(beat_folder, v)
+    threading.Thread(target=prefetch_task, daemon=True).start()
+
+def filter_beats(query, cancelled=None):
     query = query.lower()
     filtered_beats = []
-    for beat, info in beats_data_cache.items():
+    for beat, info in list(beats_data_cache.items()):
+        if cancelled and cancelled():
+            return None
+        if beat not in project_roots:
+            continue
         if query in beat.lower():
             filtered_beats.append(beat)
             continue
-        if any(query in v for v in info["versions"]):
+        if any(query in v.lower() for v in info["versions"]):
             filtered_beats.append(beat)
             continue
-        if any(query in note for note in info["notes"].values()):
+        if any(query in note.lower() for note in get_all_notes_for_beat(beat).values()):
             filtered_beats.append(beat)
             continue
     return filtered_beats
@@ -264,14 +543,1346 @@ def filter_beats(query):
 def filter_versions(folder, query):
     query = query.lower()
     all_versions = get_versions_for_beat(folder)
+    all_notes = get_all_notes_for_beat(folder)
     filtered_versions = []
     for v in all_versions:
         v_lower = v.lower()
-        notes = get_notes_for_version(folder, v).lower()
+        notes = all_notes.get(v, "").lower()
         if query in v_lower or query in notes:
             filtered_versions.append(v)
     return filtered_versions
 
+def hash_file(path, throttle=None, algorithm="sha256"):
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            for start in range(0, size, HASH_CHUNK_SIZE):
+                chunk = view[start:start + HASH_CHUNK_SIZE]
+                digest.update(chunk)
+                chunk.release()
+                if throttle:
+                    throttle(min(HASH_CHUNK_SIZE, size - start))
+    return digest.hexdigest()
+
+def write_json_atomic(path, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+# === Notes Journal ===
+# Optional notes store: one append-only notes.journal per project instead of a .txt per
+# version. Each line is "<crc32> <json>"; the newest record for a version wins and a
+# {"d": true} record deletes it. A torn last line from a crash fails its CRC and is cut
+# off before the next append; a bad line anywhere else is damage, so it is skipped and
+# counted (full scrubs report it) and the records after it still load. The in-memory
+# index maps version -> (offset, length) so a single note is one seek + read, appends
+# extend it in place, and the whole journal is one sequential read.
+def _encode_journal_record(record):
+    payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+    return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+def _decode_journal_line(line):
+    if len(line) < 10 or not line.endswith(b"\n") or line[8:9] != b" ":
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload.decode("utf-8"))
+    except ValueError:
+        return None
+
+def _load_journal_index(beat_folder, collect_notes=False):
+    journal_path = beat_path(beat_folder, NOTES_JOURNAL_FILE)
+    try:
+        st = os.stat(journal_path)
+    except OSError:
+        notes_journal_index.pop(beat_folder, None)
+        return None, {}
+    cached = notes_journal_index.get(beat_folder)
+    if cached and not collect_notes and (cached["size"], cached["mtime"]) == (st.st_size, st.st_mtime_ns):
+        return cached, None
+    index = _new_journal_index(st)
+    notes = {}
+    with open(journal_path, "rb") as f:
+        lines = iter(f)
+        line = next(lines, None)
+        while line is not None:
+            following = next(lines, None)
+            record = _decode_journal_line(line)
+            if record is None:
+                if following is None:
+                    break
+                index["damaged"] += 1
+                index["dead_bytes"] += len(line)
+                index["valid_end"] += len(line)
+            else:
+                _index_journal_record(index, record, len(line))
+                if record.get("d"):
+                    notes.pop(record["v"], None)
+                else:
+                    notes[record["v"]] = record["n"]
+            line = following
+    notes_journal_index[beat_folder] = index
+    return index, notes
+
+def _new_journal_index(st):
+    return {"size": st.st_size, "mtime": st.st_mtime_ns, "valid_end": 0, "dead_bytes": 0, "damaged": 0, "entries": {}}
+
+def _index_journal_record(index, record, length):
+    previous = index["entries"].pop(record["v"], None)
+    if previous:
+        index["dead_bytes"] += previous[1]
+    if record.get("d"):
+        index["dead_bytes"] += length
+    else:
+        index["entries"][record["v"]] = (index["valid_end"], length)
+    index["valid_end"] += length
+
+def read_journal_note(beat_folder, version_file):
+    with notes_journal_lock:
+        index, _ = _load_journal_index(beat_folder)
+        if not index or version_file not in index["entries"]:
+            return None
+        offset, length = index["entries"][version_file]
+        with open(beat_path(beat_folder, NOTES_JOURNAL_FILE), "rb") as f:
+            f.seek(offset)
+            record = _decode_journal_line(f.read(length))
+    return record["n"] if record else None
+
+def read_journal_notes(beat_folder):
+    with notes_journal_lock:
+        return _load_journal_index(beat_folder, collect_notes=True)[1]
+
+def append_journal_records(beat_folder, records):
+    journal_path = beat_path(beat_folder, NOTES_JOURNAL_FILE)
+    with notes_journal_lock:
+        index, _ = _load_journal_index(beat_folder)
+        lines = [_encode_journal_record(r) for r in records]
+        with open(journal_path, "ab") as f:
+            if index is None:
+                index = _new_journal_index(os.fstat(f.fileno()))
+            elif index["valid_end"] < index["size"]:
+                f.truncate(index["valid_end"])
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+            st = os.fstat(f.fileno())
+        for record, line in zip(records, lines):
+            _index_journal_record(index, record, len(line))
+        index["size"], index["mtime"] = st.st_size, st.st_mtime_ns
+        notes_journal_index[beat_folder] = index
+        live_bytes = index["valid_end"] - index["dead_bytes"]
+        if index["dead_bytes"] > NOTES_COMPACT_MIN_BYTES and index["dead_bytes"] > live_bytes:
+            compact_notes_journal(beat_folder)
+
+def compact_notes_journal(beat_folder, rename=None):
+    journal_path = beat_path(beat_folder, NOTES_JOURNAL_FILE)
+    with notes_journal_lock:
+        notes = read_journal_notes(beat_folder)
+        if rename:
+            notes = {rename(v): n for v, n in notes.items()}
+        with open(journal_path + ".tmp", "wb") as f:
+            f.write(b"".join(_encode_journal_record({"v": v, "n": n}) for v, n in notes.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(journal_path + ".tmp", journal_path)
+        notes_journal_index.pop(beat_folder, None)
+
+def migrate_notes_to_journal(beat_folder):
+    folder_path = beat_path(beat_folder)
+    txt_files = [f for f in os.listdir(folder_path) if f.endswith(".txt")]
+    if not txt_files:
+        return 0
+    # As in get_all_notes_for_beat, a journal note wins over a loose .txt for the same version.
+    journal_notes = read_journal_notes(beat_folder) or {}
+    records = []
+    for f in txt_files:
+        version_file = f[:-len(".txt")] + ".flp"
+        if version_file in journal_notes:
+            continue
+        with open(os.path.join(folder_path, f), "r") as note_f:
+            records.append({"v": version_file, "n": note_f.read()})
+    # Everything is fsynced into the journal before any .txt is removed.
+    if records:
+        append_journal_records(beat_folder, records)
+    for f in txt_files:
+        os.remove(os.path.join(folder_path, f))
+    return len(records)
+
+def migrate_library_to_journal():
+    save_config(notes_store="journal")
+    migrated = 0
+    for beat in get_beat_folders():
+        migrated += migrate_notes_to_journal(beat)
+        if os.path.exists(beat_path(beat, NOTES_JOURNAL_FILE)):
+            compact_notes_journal(beat)
+    return migrated
+
+# === Project Bundles ===
+# A bundle is BUNDLE_MAGIC, then the zlib-compressed blocks of every file back to back,
+# then a JSON index (names, sizes, hashes, block lengths, notes) and a fixed-size trailer
+# pointing at the index. Import reads the trailer first, so it can restore any subset.
+def _iter_bundle_blocks(beat_folder, entries):
+    for entry in entries:
+        with open(beat_path(beat_folder, entry["name"]), "rb") as f:
+            while True:
+                block = f.read(BUNDLE_BLOCK_SIZE)
+                if not block:
+                    break
+                yield entry, block
+
+def export_project_bundle(beat_folder, bundle_path, progress=None):
+    entries = []
+    notes = get_all_notes_for_beat(beat_folder)
+    for version_file in get_versions_for_beat(beat_folder):
+        entries.append({
+            "name": version_file,
+            "size": os.path.getsize(beat_path(beat_folder, version_file)),
+            "notes": notes.get(version_file, ""),
+            "blocks": [],
+        })
+    total_bytes = sum(entry["size"] for entry in entries) or 1
+    digests = {entry["name"]: hashlib.sha256() for entry in entries}
+    done_bytes = 0
+    part_path = bundle_path + ".part"
+    with open(part_path, "wb") as out, ThreadPoolExecutor(max_workers=BUNDLE_WORKERS) as pool:
+        out.write(BUNDLE_MAGIC)
+        pending = deque()
+
+        def write_oldest():
+            nonlocal done_bytes
+            entry, raw_size, future = pending.popleft()
+            compressed = future.result()
+            entry.setdefault("offset", out.tell())
+            out.write(compressed)
+            entry["blocks"].append(len(compressed))
+            done_bytes += raw_size
+            if progress:
+                progress(done_bytes / total_bytes)
+
+        # Blocks are compressed on the pool (zlib releases the GIL) but written strictly in
+        # order; the bounded queue keeps memory at a few blocks per worker for any project size.
+        for entry, block in _iter_bundle_blocks(beat_folder, entries):
+            digests[entry["name"]].update(block)
+            pending.append((entry, len(block), pool.submit(zlib.compress, block, BUNDLE_COMPRESSION_LEVEL)))
+            if len(pending) >= BUNDLE_WORKERS * 2:
+                write_oldest()
+        while pending:
+            write_oldest()
+        for entry in entries:
+            entry["sha256"] = digests[entry["name"]].hexdigest()
+            entry.setdefault("offset", out.tell())
+        index_offset = out.tell()
+        out.write(json.dumps({
+            "project": beat_folder,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "entries": entries,
+        }).encode("utf-8"))
+        out.write(BUNDLE_TRAILER.pack(index_offset, BUNDLE_TRAILER_TAG))
+    os.replace(part_path, bundle_path)
+    return len(entries)
+
+def read_bundle_index(bundle_path):
+    with open(bundle_path, "rb") as f:
+        if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+            raise ValueError(f"'{os.path.basename(bundle_path)}' is not a FLowTrack bundle.")
+        end = f.seek(-BUNDLE_TRAILER.size, os.SEEK_END)
+        index_offset, tag = BUNDLE_TRAILER.unpack(f.read(BUNDLE_TRAILER.size))
+        if tag != BUNDLE_TRAILER_TAG or not len(BUNDLE_MAGIC) <= index_offset <= end:
+            raise ValueError(f"'{os.path.basename(bundle_path)}' is truncated or damaged.")
+        f.seek(index_offset)
+        index = json.loads(f.read(end - index_offset).decode("utf-8"))
+    # Bundles come from other machines; names are joined to library paths, so refuse
+    # anything that could point outside the project folder.
+    if not _is_safe_bundle_name(index.get("project")) or not all(
+        _is_safe_bundle_name(e.get("name")) and e["name"].endswith(".flp") for e in index.get("entries", [])
+    ):
+        raise ValueError(f"'{os.path.basename(bundle_path)}' contains unsafe file names.")
+    return index
+
+def _is_safe_bundle_name(name):
+    return (
+        isinstance(name, str) and name.strip() != ""
+        and not any(sep in name for sep in ("/", "\\", ":", "\0"))
+        and name not in (".", "..")
+        and not os.path.isabs(name)
+    )
+
+def _unique_import_name(folder_path, version_file):
+    stem = version_file[:-len(".flp")]
+    n = 1
+    while True:
+        candidate = f"{stem} (imported {n}).flp"
+        if not os.path.exists(os.path.join(folder_path, candidate)):
+            return candidate
+        n += 1
+
+def import_project_bundle(bundle_path, selected_names=None, progress=None):
+    index = read_bundle_index(bundle_path)
+    beat_folder = index["project"]
+    check_not_moving(beat_folder)
+    folder_path = new_project_path(beat_folder)
+    os.makedirs(folder_path, exist_ok=True)
+    present_file = f"{beat_folder}.flp"
+    existing_hashes = {
+        hash_file(os.path.join(folder_path, f))
+        for f in os.listdir(folder_path) if f.endswith(".flp")
+    }
+    entries = [e for e in index["entries"] if selected_names is None or e["name"] in selected_names]
+    total_bytes = sum(e["size"] for e in entries) or 1
+    done_bytes = 0
+    imported = skipped = 0
+    with open(bundle_path, "rb") as f, ThreadPoolExecutor(max_workers=BUNDLE_WORKERS) as pool:
+        for entry in entries:
+            name = entry["name"]
+            target_exists = os.path.exists(os.path.join(folder_path, name))
+            if entry["sha256"] in existing_hashes and (name != present_file or target_exists):
+                skipped += 1
+                done_bytes += entry["size"]
+                continue
+            if target_exists:
+                name = _unique_import_name(folder_path, name)
+            target_path = os.path.join(folder_path, name)
+            f.seek(entry["offset"])
+            digest = hashlib.sha256()
+            with open(target_path + ".part", "wb") as out:
+                pending = deque()
+                for block_len in entry["blocks"]:
+                    pending.append(pool.submit(zlib.decompress, f.read(block_len)))
+                    if len(pending) >= BUNDLE_WORKERS * 2:
+                        block = pending.popleft().result()
+                        digest.update(block)
+                        out.write(block)
+                while pending:
+                    block = pending.popleft().result()
+                    digest.update(block)
+                    out.write(block)
+            if digest.hexdigest() != entry["sha256"]:
+                os.remove(target_path + ".part")
+                raise ValueError(f"'{entry['name']}' is corrupted inside the bundle.")
+            os.replace(target_path + ".part", target_path)
+            record_checksum(beat_folder, name, entry["sha256"])
+            existing_hashes.add(entry["sha256"])
+            if entry.get("notes") and not get_notes_for_version(beat_folder, name):
+                set_notes_for_version(beat_folder, name, entry["notes"])
+            imported += 1
+            done_bytes += entry["size"]
+            if progress:
+                progress(done_bytes / total_bytes)
+    return beat_folder, imported, skipped
+
+# === Integrity Catalog ===
+# checksums.json maps "beat/version.flp" to the sha256, size and mtime recorded when the
+# version was created. Timestamped versions never change, so any hash mismatch is
+# corruption; the present version is rewritten by FL Studio, so for it only a broken
+# FLP structure counts.
+def load_checksum_catalog():
+    global checksum_catalog
+    with checksum_catalog_lock:
+        if checksum_catalog is None:
+            checksum_catalog = {"files": {}, "last_full_pass": 0}
+            if os.path.exists(CHECKSUM_CATALOG_FILE):
+                try:
+                    with open(CHECKSUM_CATALOG_FILE, "r") as f:
+                        checksum_catalog = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return checksum_catalog
+
+def save_checksum_catalog():
+    with checksum_catalog_lock:
+        write_json_atomic(CHECKSUM_CATALOG_FILE, load_checksum_catalog())
+        if storage_usage is not None:
+            write_json_atomic(STORAGE_USAGE_FILE, storage_usage)
+
+def flp_is_intact(path):
+    # FLP layout: "FLhd" + len + header, then "FLdt" + len + event data running to EOF.
+    try:
+        with open(path, "rb") as f:
+            header = f.read(22)
+            size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return False
+    if len(header) < 22 or header[:4] != b"FLhd" or header[14:18] != b"FLdt":
+        return False
+    header_len = struct.unpack("<I", header[4:8])[0]
+    data_len = struct.unpack("<I", header[18:22])[0]
+    return header_len == 6 and 22 + data_len == size
+
+def record_checksum(beat_folder, version_file, digest=None, save=True):
+    path = beat_path(beat_folder, version_file)
+    st = os.stat(path)
+    if digest is None:
+        digest = hash_file(path)
+    with checksum_catalog_lock:
+        load_checksum_catalog()["files"][f"{beat_folder}/{version_file}"] = {
+            "sha256": digest,
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "verified": time.time(),
+            "status": "ok" if flp_is_intact(path) else "corrupt",
+        }
+        account_version(beat_folder, version_file, st.st_size, digest)
+        if save:
+            save_checksum_catalog()
+
+def forget_checksums(beat_folder, version_file=None):
+    with checksum_catalog_lock:
+        files = load_checksum_catalog()["files"]
+        if version_file:
+            files.pop(f"{beat_folder}/{version_file}", None)
+        else:
+            for key in [k for k in files if k.startswith(f"{beat_folder}/")]:
+                del files[key]
+        unaccount_versions(beat_folder, version_file)
+        save_checksum_catalog()
+
+def rename_checksums(old_name, new_name):
+    with checksum_catalog_lock:
+        files = load_checksum_catalog()["files"]
+        for key in [k for k in files if k.startswith(f"{old_name}/")]:
+            version_file = key.split("/", 1)[1]
+            files[f"{new_name}/{version_file.replace(old_name, new_name, 1)}"] = files.pop(key)
+        rename_usage(old_name, new_name)
+        save_checksum_catalog()
+
+def get_integrity_status(beat_folder, version_file):
+    with checksum_catalog_lock:
+        entry = load_checksum_catalog()["files"].get(f"{beat_folder}/{version_file}")
+    return entry["status"] if entry else None
+
+def make_throttle(bytes_per_second):
+    # Shared across hashing threads, so the whole scrub stays under the budget.
+    lock = threading.Lock()
+    state = {"start": time.monotonic(), "sent": 0}
+    def throttle(nbytes):
+        with lock:
+            state["sent"] += nbytes
+            ahead = state["sent"] / bytes_per_second - (time.monotonic() - state["start"])
+        if ahead > 0:
+            time.sleep(ahead)
+    return throttle
+
+def scrub_library(full=False, rate=SCRUB_RATE_BYTES, progress=None):
+    catalog = load_checksum_catalog()
+    candidates = []
+    seen = set()
+    beats = get_beat_folders()
+    for beat in beats:
+        for version_file in get_versions_for_beat(beat):
+            key = f"{beat}/{version_file}"
+            path = beat_path(beat, version_file)
+            seen.add(key)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            with checksum_catalog_lock:
+                entry = catalog["files"].get(key)
+            unchanged = entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns
+            if unchanged and not full and entry["status"] == "ok":
+                continue
+            candidates.append((beat, version_file, key, path, st))
+    throttle = make_throttle(rate) if rate else None
+    flagged = []
+    done = 0
+
+    def check(candidate):
+        beat, version_file, key, path, st = candidate
+        return candidate, hash_file(path, throttle), flp_is_intact(path)
+
+    with ThreadPoolExecutor(max_workers=SCRUB_WORKERS) as pool:
+        for (beat, version_file, key, path, st), digest, intact in pool.map(check, candidates):
+            is_present_version = version_file == f"{beat}.flp"
+            with checksum_catalog_lock:
+                entry = catalog["files"].get(key)
+                if entry is None or (is_present_version and digest != entry["sha256"]):
+                    entry = catalog["files"][key] = {"sha256": digest, "size": st.st_size, "mtime": st.st_mtime_ns}
+                    account_version(beat, version_file, st.st_size, digest)
+                ok = intact and digest == entry["sha256"]
+                if ok:
+                    # Same content under a new mtime (a touch, a move onto FAT/exFAT): take
+                    # the new stat so later passes can skip it again.
+                    entry["size"] = st.st_size
+                    entry["mtime"] = st.st_mtime_ns
+                entry["status"] = "ok" if ok else "corrupt"
+                entry["verified"] = time.time()
+            if not ok:
+                flagged.append(key)
+            done += 1
+            if progress:
+                progress(done / len(candidates))
+    if full:
+        for beat in beats:
+            with notes_journal_lock:
+                index, _ = _load_journal_index(beat)
+            if index and index["damaged"]:
+                flagged.append(f"{beat}/{NOTES_JOURNAL_FILE}")
+    with checksum_catalog_lock:
+        # Versions created while the pass ran were not in the listing; only forget files
+        # that are really gone. A project missing from the index may be on an offline root,
+        # so its keys are kept (deleting a project forgets its checksums itself).
+        with library_index_lock:
+            indexed = dict(project_roots)
+        def is_gone(key):
+            beat, version_file = key.split("/", 1)
+            return beat in indexed and not os.path.exists(os.path.join(indexed[beat], beat, version_file))
+        for key in [k for k in catalog["files"] if k not in seen and is_gone(k)]:
+            del catalog["files"][key]
+            unaccount_versions(*key.split("/", 1))
+        if full:
+            catalog["last_full_pass"] = time.time()
+        save_checksum_catalog()
+    return flagged
+
+def get_flagged_versions():
+    with checksum_catalog_lock:
+        return sorted(k for k, e in load_checksum_catalog()["files"].items() if e["status"] != "ok")
+
+# === Storage Usage ===
+# storage_usage.json holds running totals that are adjusted whenever the checksum catalog
+# records or forgets a version, so every dashboard figure is read, never recomputed.
+# Dedup savings count each extra copy of a sha256; retention savings count timestamped
+# versions beyond the newest RETENTION_KEEP_VERSIONS of each project. Each project keeps
+# its timestamped versions in a sorted timeline, so adding or removing one only moves the
+# keep/prune boundary by a single version. "largest" is the maintained top
+# STORAGE_TOP_PROJECTS list; only a listed project shrinking below the cut-off or being
+# deleted marks it stale, and it is then rebuilt once when next read.
+def load_storage_usage():
+    global storage_usage
+    with checksum_catalog_lock:
+        if storage_usage is not None:
+            return storage_usage
+        if os.path.exists(STORAGE_USAGE_FILE):
+            try:
+                with open(STORAGE_USAGE_FILE, "r") as f:
+                    storage_usage = json.load(f)
+                _upgrade_storage_usage(storage_usage)
+                if not storage_usage.get("samples_counted"):
+                    _count_collected_samples(storage_usage)
+                return storage_usage
+            except (OSError, ValueError):
+                pass
+        storage_usage = {
+            "library_total": 0,
+            "version_count": 0,
+            "dedup_reclaimable": 0,
+            "retention_reclaimable": 0,
+            "retention_keep": load_config().get("retention_keep", RETENTION_KEEP_VERSIONS),
+            "projects": {},
+            "hash_refs": {},
+            "history": [],
+            "largest": [],
+            "largest_stale": False,
+        }
+        # One-time walk for libraries that predate the usage file; hashes come from the
+        # catalog where known and are filled in by the scrubber otherwise.
+        catalog_files = load_checksum_catalog()["files"]
+        for beat in get_beat_folders():
+            for version_file in get_versions_for_beat(beat):
+                try:
+                    size = os.path.getsize(beat_path(beat, version_file))
+                except OSError:
+                    continue
+                entry = catalog_files.get(f"{beat}/{version_file}")
+                account_version(beat, version_file, size, entry["sha256"] if entry else None)
+        _count_collected_samples(storage_usage)
+        return storage_usage
+
+def _count_collected_samples(usage):
+    for beat in get_beat_folders():
+        size = _folder_size(beat_path(beat, SAMPLES_DIR))
+        if size:
+            account_samples(beat, size)
+    usage["samples_counted"] = True
+
+def _folder_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _add_hash_ref(usage, digest, size):
+    if not digest:
+        return
+    ref = usage["hash_refs"].setdefault(digest, [size, 0])
+    if ref[1] >= 1:
+        usage["dedup_reclaimable"] += ref[0]
+    ref[1] += 1
+
+def _remove_hash_ref(usage, digest):
+    ref = usage["hash_refs"].get(digest) if digest else None
+    if not ref:
+        return
+    ref[1] -= 1
+    if ref[1] >= 1:
+        usage["dedup_reclaimable"] -= ref[0]
+    else:
+        del usage["hash_refs"][digest]
+
+def _upgrade_storage_usage(usage):
+    # Files written before the timeline and top list existed, or under another
+    # retention_keep, get both rebuilt once here.
+    keep = load_config().get("retention_keep", RETENTION_KEEP_VERSIONS)
+    if "largest" not in usage:
+        usage["largest"] = []
+        usage["largest_stale"] = True
+    if usage.get("retention_keep") == keep and all("timeline" in p for p in usage["projects"].values()):
+        return
+    usage["retention_keep"] = keep
+    usage["retention_reclaimable"] = 0
+    for beat, project in usage["projects"].items():
+        project["timeline"] = sorted(_timeline_item(v) for v in project["versions"] if v != f"{beat}.flp")
+        pruned = project["timeline"][:max(len(project["timeline"]) - keep, 0)]
+        project["retention"] = sum(project["versions"][v][0] for _, v in pruned)
+        usage["retention_reclaimable"] += project["retention"]
+
+def _timeline_item(version_file):
+    return [extract_timestamp(version_file).strftime("%Y-%m-%d %H:%M"), version_file]
+
+def _adjust_retention(usage, project, delta):
+    project["retention"] += delta
+    usage["retention_reclaimable"] += delta
+
+def _timeline_insert(usage, project, version_file):
+    timeline = project["timeline"]
+    item = _timeline_item(version_file)
+    i = bisect.bisect_left(timeline, item)
+    timeline.insert(i, item)
+    pruned = len(timeline) - usage["retention_keep"]
+    if pruned > 0:
+        # Either the new version is itself past the boundary, or it pushes the oldest kept one over.
+        moved = version_file if i < pruned else timeline[pruned - 1][1]
+        _adjust_retention(usage, project, project["versions"][moved][0])
+
+def _timeline_remove(usage, project, version_file, size):
+    timeline = project["timeline"]
+    item = _timeline_item(version_file)
+    i = bisect.bisect_left(timeline, item)
+    if i == len(timeline) or timeline[i] != item:
+        return
+    pruned = len(timeline) - usage["retention_keep"]
+    if pruned > 0:
+        _adjust_retention(usage, project, -(size if i < pruned else project["versions"][timeline[pruned - 1][1]][0]))
+    del timeline[i]
+
+def _update_largest(usage, beat_folder, total):
+    largest = usage["largest"]
+    full = len(largest) >= STORAGE_TOP_PROJECTS
+    cutoff = largest[-1][0] if largest else 0
+    listed = next((item for item in largest if item[1] == beat_folder), None)
+    if listed:
+        largest.remove(listed)
+        # Unlisted projects are only known to be <= the old cut-off.
+        if full and len(usage["projects"]) > len(largest) + (total is not None) and (total is None or total < cutoff):
+            usage["largest_stale"] = True
+    elif total is None or (full and total <= cutoff):
+        return
+    if total is not None:
+        largest.append([total, beat_folder])
+        largest.sort(reverse=True)
+        del largest[STORAGE_TOP_PROJECTS:]
+
+def _adjust_project_total(usage, beat_folder, project, delta):
+    project["total"] += delta
+    usage["library_total"] += delta
+    if delta:
+        _update_largest(usage, beat_folder, project["total"])
+
+def _record_growth(usage):
+    today = datetime.now().strftime("%Y-%m-%d")
+    if usage["history"] and usage["history"][-1][0] == today:
+        usage["history"][-1][1] = usage["library_total"]
+    else:
+        usage["history"].append([today, usage["library_total"]])
+
+def _usage_project(usage, beat_folder):
+    project = usage["projects"].get(beat_folder)
+    if project is None:
+        project = usage["projects"][beat_folder] = {"versions": {}, "timeline": [], "total": 0, "retention": 0, "samples": 0}
+        _update_largest(usage, beat_folder, 0)
+    return project
+
+def account_samples(beat_folder, size):
+    # Samples collected into the project's samples folder count towards its total.
+    with checksum_catalog_lock:
+        usage = load_storage_usage()
+        project = _usage_project(usage, beat_folder)
+        _adjust_project_total(usage, beat_folder, project, size - project.get("samples", 0))
+        project["samples"] = size
+        if not project["versions"] and not size:
+            del usage["projects"][beat_folder]
+            _update_largest(usage, beat_folder, None)
+        _record_growth(usage)
+
+def account_version(beat_folder, version_file, size, digest):
+    with checksum_catalog_lock:
+        usage = load_storage_usage()
+        project = _usage_project(usage, beat_folder)
+        timestamped = version_file != f"{beat_folder}.flp"
+        old = project["versions"].get(version_file)
+        if old:
+            _remove_hash_ref(usage, old[1])
+            if timestamped:
+                _timeline_remove(usage, project, version_file, old[0])
+        else:
+            usage["version_count"] += 1
+        project["versions"][version_file] = [size, digest]
+        _adjust_project_total(usage, beat_folder, project, size - (old[0] if old else 0))
+        _add_hash_ref(usage, digest, size)
+        if timestamped:
+            _timeline_insert(usage, project, version_file)
+        _record_growth(usage)
+
+def unaccount_versions(beat_folder, version_file=None):
+    with checksum_catalog_lock:
+        usage = load_storage_usage()
+        project = usage["projects"].get(beat_folder)
+        if not project:
+            return
+        for v in ([version_file] if version_file else list(project["versions"])):
+            old = project["versions"].get(v)
+            if not old:
+                continue
+            if v != f"{beat_folder}.flp":
+                _timeline_remove(usage, project, v, old[0])
+            del project["versions"][v]
+            _adjust_project_total(usage, beat_folder, project, -old[0])
+            usage["version_count"] -= 1
+            _remove_hash_ref(usage, old[1])
+        if version_file is None and project.get("samples"):
+            _adjust_project_total(usage, beat_folder, project, -project["samples"])
+            project["samples"] = 0
+        if not project["versions"] and not project.get("samples"):
+            del usage["projects"][beat_folder]
+            _update_largest(usage, beat_folder, None)
+        _record_growth(usage)
+
+def rename_usage(old_name, new_name):
+    with checksum_catalog_lock:
+        usage = load_storage_usage()
+        project = usage["projects"].pop(old_name, None)
+        if project:
+            project["versions"] = {v.replace(old_name, new_name, 1): info for v, info in project["versions"].items()}
+            project["timeline"] = sorted(_timeline_item(v) for v in project["versions"] if v != f"{new_name}.flp")
+            usage["projects"][new_name] = project
+            for item in usage["largest"]:
+                if item[1] == old_name:
+                    item[1] = new_name
+
+def get_largest_projects():
+    with checksum_catalog_lock:
+        usage = load_storage_usage()
+        if usage["largest_stale"]:
+            usage["largest"] = [list(item) for item in heapq.nlargest(
+                STORAGE_TOP_PROJECTS, ((p["total"], beat) for beat, p in usage["projects"].items())
+            )]
+            usage["largest_stale"] = False
+        return [tuple(item) for item in usage["largest"]]
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+# === Drive Session ===
+# One authenticated GoogleDrive for the whole app. Credentials (with a refresh token) are
+# saved to drive_credentials.json, so the browser sign-in only happens once, and a
+# background thread refreshes the access token before it expires. Each worker thread
+# keeps its own authorized HTTP object so its keep-alive connection is reused.
+def get_drive():
+    global drive_session
+    with drive_session_lock:
+        if drive_session is not None:
+            return drive_session
+        ensure_client_secrets()
+        gauth = GoogleAuth()
+        gauth.settings["get_refresh_token"] = True
+        if os.path.exists(DRIVE_CREDENTIALS_FILE):
+            gauth.LoadCredentialsFile(DRIVE_CREDENTIALS_FILE)
+        if gauth.credentials is None:
+            gauth.LocalWebserverAuth()
+        elif gauth.access_token_expired:
+            try:
+                gauth.Refresh()
+                gauth.Authorize()
+            except Exception:
+                gauth.LocalWebserverAuth()
+        else:
+            gauth.Authorize()
+        gauth.SaveCredentialsFile(DRIVE_CREDENTIALS_FILE)
+        drive_session = GoogleDrive(gauth)
+        threading.Thread(target=_refresh_drive_token, args=(drive_session,), daemon=True).start()
+        return drive_session
+
+def reset_drive_session():
+    global drive_session
+    with drive_session_lock:
+        drive_session = None
+
+def _refresh_drive_token(drive):
+    gauth = drive.auth
+    while drive_session is drive:
+        expiry = gauth.credentials.token_expiry
+        if expiry is None:
+            delay = DRIVE_TOKEN_REFRESH_MARGIN
+        else:
+            delay = (expiry - datetime.utcnow()).total_seconds() - DRIVE_TOKEN_REFRESH_MARGIN
+        time.sleep(max(delay, 30))
+        with drive_session_lock:
+            if drive_session is not drive:
+                return
+            try:
+                gauth.Refresh()
+                gauth.SaveCredentialsFile(DRIVE_CREDENTIALS_FILE)
+            except Exception:
+                # Revoked or offline: start over with a fresh sign-in on the next Drive action.
+                reset_drive_session()
+                return
+
+def get_drive_http(drive):
+    if getattr(drive_http_local, "drive", None) is not drive:
+        drive_http_local.drive = drive
+        drive_http_local.http = drive.auth.Get_Http_Object()
+    return drive_http_local.http
+
+def run_drive_batch(drive, requests):
+    responses = [None] * len(requests)
+    errors = []
+    def callback(request_id, response, exception):
+        if exception is not None:
+            errors.append(exception)
+        else:
+            responses[int(request_id)] = response
+    for start in range(0, len(requests), DRIVE_BATCH_LIMIT):
+        batch = drive.auth.service.new_batch_http_request(callback=callback)
+        for i in range(start, min(start + DRIVE_BATCH_LIMIT, len(requests))):
+            batch.add(requests[i], request_id=str(i))
+        batch.execute(http=get_drive_http(drive))
+        if errors:
+            raise errors[0]
+    return responses
+
+def download_drive_file(drive, file_id, path):
+    request = drive.auth.service.files().get_media(fileId=file_id)
+    request.http = get_drive_http(drive)
+    with open(path, "wb") as f:
+        downloader = MediaIoBaseDownload(f, request, chunksize=DRIVE_DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+
+# === Drive Sync ===
+# drive_manifest.json keeps a mirror of everything under "FLowTrack Projects" plus, per
+# "beat/title" key, the state both sides had at the last successful sync. After the first
+# full listing the mirror is kept current from the Drive change feed, so planning a sync
+# only costs one changes request plus a stat per local file.
+def load_drive_manifest():
+    manifest = {"root_id": None, "page_token": None, "folders": {}, "remote": {}, "synced": {}}
+    if os.path.exists(DRIVE_MANIFEST_FILE):
+        try:
+            with open(DRIVE_MANIFEST_FILE, "r") as f:
+                manifest.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+    return manifest
+
+def _remote_record(drive_file, parent_id):
+    return {
+        "title": drive_file["title"].replace("\\", "/"),
+        "parent": parent_id,
+        "size": int(drive_file.get("fileSize", 0)),
+        "md5": drive_file.get("md5Checksum"),
+        "modified": drive_file.get("modifiedDate"),
+    }
+
+def _apply_drive_change(manifest, change):
+    file_id = change["fileId"]
+    drive_file = change.get("file")
+    folders = manifest["folders"]
+    if file_id == manifest["root_id"] and (change.get("deleted") or drive_file["labels"].get("trashed")):
+        manifest.update(root_id=None, page_token=None, folders={}, remote={})
+        return
+    for beat in [b for b, folder_id in folders.items() if folder_id == file_id]:
+        del folders[beat]
+    manifest["remote"].pop(file_id, None)
+    if change.get("deleted") or not drive_file or drive_file["labels"].get("trashed"):
+        return
+    parent_ids = {p["id"] for p in drive_file.get("parents", [])}
+    if drive_file["mimeType"] == DRIVE_FOLDER_MIME:
+        if manifest["root_id"] in parent_ids:
+            folders[drive_file["title"]] = file_id
+        return
+    beat_folder_ids = set(folders.values())
+    parent_id = next((p for p in parent_ids if p in beat_folder_ids), None)
+    if parent_id:
+        manifest["remote"][file_id] = _remote_record(drive_file, parent_id)
+
+def refresh_remote_state(drive, manifest):
+    service = drive.auth.service
+    http = get_drive_http(drive)
+    if manifest["root_id"] and manifest["page_token"]:
+        token = manifest["page_token"]
+        while token:
+            response = service.changes().list(pageToken=token, includeDeleted=True, maxResults=1000).execute(http=http)
+            for change in response.get("items", []):
+                _apply_drive_change(manifest, change)
+            token = response.get("nextPageToken")
+            if "newStartPageToken" in response:
+                manifest["page_token"] = response["newStartPageToken"]
+        if manifest["root_id"]:
+            return
+    # Take the change token before listing so nothing made during the listing is missed.
+    manifest.update(root_id=None, folders={}, remote={})
+    manifest["page_token"] = service.changes().getStartPageToken().execute(http=http)["startPageToken"]
+    root_list = drive.ListFile({
+        'q': f"mimeType='{DRIVE_FOLDER_MIME}' and trashed=false and title='{DRIVE_ROOT_TITLE}'"
+    }).GetList()
+    if not root_list:
+        return
+    manifest["root_id"] = root_list[0]['id']
+    beat_folders = drive.ListFile({
+        'q': f"'{manifest['root_id']}' in parents and trashed=false and mimeType='{DRIVE_FOLDER_MIME}'"
+    }).GetList()
+    # The first page of every beat folder comes back from one batched request.
+    queries = [f"'{beat_folder['id']}' in parents and trashed=false" for beat_folder in beat_folders]
+    responses = run_drive_batch(drive, [service.files().list(q=q, maxResults=1000) for q in queries])
+    for beat_folder, query, response in zip(beat_folders, queries, responses):
+        manifest["folders"][beat_folder['title']] = beat_folder['id']
+        while True:
+            for drive_file in response.get("items", []):
+                if drive_file['mimeType'] != DRIVE_FOLDER_MIME:
+                    manifest["remote"][drive_file['id']] = _remote_record(drive_file, beat_folder['id'])
+            if not response.get("nextPageToken"):
+                break
+            response = service.files().list(
+                q=query, maxResults=1000, pageToken=response["nextPageToken"]
+            ).execute(http=http)
+
+def _list_local_sync_files(beat_folder):
+    files = {}
+    if beat_folder not in project_roots:
+        return files
+    local_folder = beat_path(beat_folder)
+    if not os.path.isdir(local_folder):
+        return files
+    for root, _, names in os.walk(local_folder):
+        for name in names:
+            if OVERWRITTEN_BACKUP_PATTERN.match(name) or name.endswith(".part"):
+                continue
+            file_path = os.path.join(root, name)
+            files[os.path.relpath(file_path, local_folder).replace(os.sep, "/")] = file_path
+    return files
+
+def _safe_local_path(beat_folder, title):
+    parts = [p for p in title.split("/") if p not in ("", ".", "..")]
+    if not parts:
+        return None
+    # Projects only on Drive would be created in the primary root; see _download_sync_item.
+    with library_index_lock:
+        root = project_roots.get(beat_folder, get_library_roots()[0])
+    return os.path.join(root, beat_folder, *parts)
+
+def _local_md5(manifest, key, path, st):
+    synced = manifest["synced"].get(key)
+    if synced and synced["local_size"] == st.st_size and synced["local_mtime"] == st.st_mtime_ns:
+        return synced["md5"]
+    return hash_file(path, algorithm="md5")
+
+def plan_drive_sync(manifest, beats, push=True, pull=True):
+    moving = set(moving_projects)
+    with library_index_lock:
+        # With a library offline, a project missing locally may just be on that drive.
+        unavailable = beats - set(project_roots) if offline_roots else set()
+    plan = {
+        "upload": [], "download": [], "skip": [], "conflict": [], "deleted": [],
+        "busy": sorted(beats & moving), "offline": sorted(unavailable),
+    }
+    beats = beats - moving - unavailable
+    folder_beats = {folder_id: beat for beat, folder_id in manifest["folders"].items()}
+    remote_by_key = {}
+    for file_id, record in manifest["remote"].items():
+        beat = folder_beats.get(record["parent"])
+        if beat in beats:
+            key = f"{beat}/{record['title']}"
+            # Older uploads could leave several files with one title; the newest one wins.
+            current = remote_by_key.get(key)
+            if current is None or (record["modified"] or "") > (current[1]["modified"] or ""):
+                remote_by_key[key] = (file_id, record)
+    local_by_key = {}
+    for beat in beats:
+        for title, path in _list_local_sync_files(beat).items():
+            local_by_key[f"{beat}/{title}"] = (beat, title, path)
+    for key in sorted(set(local_by_key) | set(remote_by_key)):
+        synced = manifest["synced"].get(key)
+        beat, title = key.split("/", 1)
+        item = {"key": key, "beat": beat, "title": title, "remote_id": None, "path": _safe_local_path(beat, title)}
+        local = local_by_key.get(key)
+        remote = remote_by_key.get(key)
+        local_md5 = st = None
+        if local:
+            st = os.stat(local[2])
+            local_md5 = _local_md5(manifest, key, local[2], st)
+            item.update(path=local[2], md5=local_md5, size=st.st_size, mtime=st.st_mtime_ns)
+        if remote:
+            item["remote_id"] = remote[0]
+            item["remote_md5"] = remote[1]["md5"]
+        if local and remote:
+            if local_md5 == remote[1]["md5"]:
+                action = "skip"
+            elif synced and local_md5 == synced["md5"]:
+                action = "download"
+            elif synced and remote[1]["md5"] == synced["md5"]:
+                action = "upload"
+            elif not synced and push and not pull:
+                # Files uploaded before the manifest existed have no sync base; an
+                # explicit upload replaces them instead of adding a duplicate.
+                action = "upload"
+            else:
+                action = "conflict"
+        elif local:
+            action = "upload"
+        elif synced and remote[1]["md5"] == synced["md5"]:
+            # Synced before and unchanged on Drive since, so it was deleted here on purpose.
+            action = "deleted"
+        elif item["path"]:
+            action = "download"
+        else:
+            continue
+        if (action == "upload" and not push) or (action == "download" and not pull):
+            action = "skip"
+        plan[action].append(item)
+    return plan
+
+def ensure_drive_folders(drive, manifest, beats):
+    service = drive.auth.service
+    if not manifest["root_id"]:
+        root = service.files().insert(
+            body={'title': DRIVE_ROOT_TITLE, 'mimeType': DRIVE_FOLDER_MIME}, fields="id"
+        ).execute(http=get_drive_http(drive))
+        manifest["root_id"] = root['id']
+    missing = sorted(beat for beat in beats if beat not in manifest["folders"])
+    requests = [
+        service.files().insert(
+            body={'title': beat, 'parents': [{'id': manifest["root_id"]}], 'mimeType': DRIVE_FOLDER_MIME},
+            fields="id"
+        )
+        for beat in missing
+    ]
+    for beat, response in zip(missing, run_drive_batch(drive, requests)):
+        manifest["folders"][beat] = response['id']
+
+def _record_synced(manifest, item, remote_id, md5):
+    st = os.stat(item["path"])
+    manifest["synced"][item["key"]] = {
+        "id": remote_id,
+        "md5": md5,
+        "local_size": st.st_size,
+        "local_mtime": st.st_mtime_ns,
+    }
+
+def _upload_sync_item(drive, manifest, item):
+    parent_id = manifest["folders"][item["beat"]]
+    if item["remote_id"]:
+        gfile = drive.CreateFile({'id': item["remote_id"]})
+    else:
+        gfile = drive.CreateFile({'title': item["title"], 'parents': [{'id': parent_id}]})
+    gfile.SetContentFile(item["path"])
+    gfile.Upload(param={"http": get_drive_http(drive)})
+    return gfile['id'], {
+        "title": item["title"],
+        "parent": parent_id,
+        "size": item["size"],
+        "md5": gfile.get('md5Checksum') or item["md5"],
+        "modified": gfile.get('modifiedDate'),
+    }
+
+def _download_sync_item(drive, item):
+    new_project_path(item["beat"])
+    os.makedirs(os.path.dirname(item["path"]), exist_ok=True)
+    download_drive_file(drive, item["remote_id"], item["path"] + ".part")
+    os.replace(item["path"] + ".part", item["path"])
+
+def execute_drive_sync(drive, manifest, plan, progress=None):
+    for item in plan["skip"]:
+        if item.get("md5") and item["md5"] == item.get("remote_md5"):
+            _record_synced(manifest, item, item["remote_id"], item["md5"])
+    total = len(plan["upload"]) + len(plan["download"])
+    done = 0
+    downloaded_flps = []
+    try:
+        ensure_drive_folders(drive, manifest, {item["beat"] for item in plan["upload"]})
+        # Transfers run on a small pool; only this thread touches the manifest.
+        with ThreadPoolExecutor(max_workers=DRIVE_WORKERS) as pool:
+            futures = {pool.submit(_upload_sync_item, drive, manifest, item): ("upload", item) for item in plan["upload"]}
+            futures.update({pool.submit(_download_sync_item, drive, item): ("download", item) for item in plan["download"]})
+            for future in as_completed(futures):
+                action, item = futures[future]
+                result = future.result()
+                if action == "upload":
+                    file_id, record = result
+                    manifest["remote"][file_id] = record
+                    _record_synced(manifest, item, file_id, record["md5"])
+                else:
+                    _record_synced(manifest, item, item["remote_id"], item["remote_md5"])
+                    if item["title"].endswith(".flp") and "/" not in item["title"]:
+                        downloaded_flps.append((item["beat"], item["title"]))
+                done += 1
+                if progress:
+                    progress(done, total)
+    finally:
+        write_json_atomic(DRIVE_MANIFEST_FILE, manifest)
+        for beat_folder, version_file in downloaded_flps:
+            record_checksum(beat_folder, version_file, save=False)
+        if downloaded_flps:
+            save_checksum_catalog()
+
+def sync_with_drive(drive, beats=None, push=True, pull=True, progress=None):
+    manifest = load_drive_manifest()
+    refresh_remote_state(drive, manifest)
+    if beats is None:
+        beats = set(manifest["folders"]) | (set(get_beat_folders()) if push else set())
+    plan = plan_drive_sync(manifest, set(beats), push=push, pull=pull)
+    execute_drive_sync(drive, manifest, plan, progress)
+    return plan
+
+def describe_sync_plan(plan):
+    summary = (
+        f"Uploaded: {len(plan['upload'])}\n"
+        f"Downloaded: {len(plan['download'])}\n"
+        f"Unchanged: {len(plan['skip'])}"
+    )
+    if plan["deleted"]:
+        summary += f"\nDeleted locally, not restored: {len(plan['deleted'])}"
+    if plan["busy"]:
+        summary += f"\nSkipped while moving to another library: {', '.join(plan['busy'])}"
+    if plan["offline"]:
+        shown = ", ".join(plan["offline"][:10]) + (", ..." if len(plan["offline"]) > 10 else "")
+        summary += f"\nSkipped, may be on a disconnected library: {shown}"
+    if plan["conflict"]:
+        conflicts = "\n".join(item["key"] for item in plan["conflict"][:10])
+        more = "\n..." if len(plan["conflict"]) > 10 else ""
+        summary += f"\n\n{len(plan['conflict'])} files changed on both sides and were left untouched:\n{conflicts}{more}"
+    return summary
+
+# === Sample Dependencies ===
+# sample_index.json caches, per library root, every directory's mtime with its audio files
+# and subdirectories, so a rescan only lists directories whose mtime moved. It also caches
+# the sample paths each .flp references, keyed by the file's size and mtime.
+def _decode_flp_text(raw):
+    # FL 11.5+ writes UTF-16LE text events; older projects use 8-bit text.
+    if len(raw) >= 2 and len(raw) % 2 == 0 and raw[1::2].count(0) >= len(raw) // 4:
+        text = raw.decode("utf-16-le", errors="replace")
+    else:
+        text = raw.decode("latin-1")
+    return text.rstrip("\0").strip()
+
+def parse_flp_sample_paths(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"FLhd" or data[14:18] != b"FLdt":
+        return []
+    pos = 22
+    end = min(len(data), 22 + struct.unpack("<I", data[18:22])[0])
+    paths = []
+    # Events are one id byte then 1, 2 or 4 bytes of data (ids < 192), or a varint
+    # length and that many bytes (ids >= 192).
+    while pos < end:
+        event_id = data[pos]
+        pos += 1
+        if event_id < 64:
+            pos += 1
+        elif event_id < 128:
+            pos += 2
+        elif event_id < 192:
+            pos += 4
+        else:
+            size = shift = 0
+            while pos < end:
+                byte = data[pos]
+                pos += 1
+                size |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+            if event_id == FLP_EVENT_SAMPLE_FILENAME:
+                text = _decode_flp_text(data[pos:pos + size])
+                if text:
+                    paths.append(text)
+            pos += size
+    return list(dict.fromkeys(paths))
+
+def load_sample_index():
+    global sample_index
+    with sample_index_lock:
+        if sample_index is None:
+            sample_index = {"roots": {}, "flp_refs": {}}
+            if os.path.exists(SAMPLE_INDEX_FILE):
+                try:
+                    with open(SAMPLE_INDEX_FILE, "r") as f:
+                        sample_index = json.load(f)
+                except (OSError, ValueError):
+                    pass
+            _rebuild_sample_lookup()
+        return sample_index
+
+def save_sample_index():
+    with sample_index_lock:
+        write_json_atomic(SAMPLE_INDEX_FILE, load_sample_index())
+
+def _rebuild_sample_lookup():
+    global sample_lookup
+    lookup = {}
+    for root, dirs in sample_index["roots"].items():
+        for rel, (_, files, _) in dirs.items():
+            for name in files:
+                lookup.setdefault(name.lower(), []).append(os.path.join(root, rel, name))
+    sample_lookup = lookup
+
+def _scan_sample_root(root, old_dirs):
+    dirs = {}
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        full = os.path.join(root, rel)
+        try:
+            mtime = os.stat(full).st_mtime_ns
+        except OSError:
+            continue
+        cached = old_dirs.get(rel)
+        if cached and cached[0] == mtime:
+            files, subdirs = cached[1], cached[2]
+        else:
+            files, subdirs = [], []
+            try:
+                with os.scandir(full) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.name.lower().endswith(SAMPLE_EXTENSIONS):
+                            files.append(entry.name)
+            except OSError:
+                continue
+        dirs[rel] = [mtime, files, subdirs]
+        stack.extend(os.path.join(rel, d) for d in subdirs)
+    return dirs
+
+def update_sample_index():
+    roots = load_config().get("sample_libraries", [])
+    with sample_index_lock:
+        old_roots = load_sample_index()["roots"]
+    with ThreadPoolExecutor(max_workers=max(1, min(len(roots), 8))) as pool:
+        scanned = dict(zip(roots, pool.map(lambda r: _scan_sample_root(r, old_roots.get(r, {})), roots)))
+    with sample_index_lock:
+        sample_index["roots"] = scanned
+        _rebuild_sample_lookup()
+        save_sample_index()
+    return sum(len(files) for dirs in scanned.values() for _, files, _ in dirs.values())
+
+def get_version_sample_refs(beat_folder, version_file):
+    path = beat_path(beat_folder, version_file)
+    st = os.stat(path)
+    key = f"{beat_folder}/{version_file}"
+    with sample_index_lock:
+        cached = load_sample_index()["flp_refs"].get(key)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+    refs = parse_flp_sample_paths(path)
+    with sample_index_lock:
+        sample_index["flp_refs"][key] = [st.st_size, st.st_mtime_ns, refs]
+    return refs
+
+def _path_parts(path):
+    return [p.lower() for p in re.split(r"[\\/]", path) if p]
+
+def resolve_sample(ref):
+    if ref.startswith("%FLStudio"):
+        return "builtin", ref
+    if os.path.exists(ref):
+        return "found", ref
+    candidates = [c for c in sample_lookup.get(ntpath.basename(ref).lower(), []) if os.path.exists(c)]
+    if not candidates:
+        return "missing", ref
+    # Prefer the candidate whose trailing folders match the original path best.
+    ref_parts = _path_parts(ref)[::-1]
+    def shared_tail(candidate):
+        n = 0
+        for a, b in zip(ref_parts, _path_parts(candidate)[::-1]):
+            if a != b:
+                break
+            n += 1
+        return n
+    return "relocated", max(candidates, key=shared_tail)
+
+def analyze_project_samples(beat_folder, save=True):
+    load_sample_index()
+    results = {}
+    for version_file in get_versions_for_beat(beat_folder):
+        for ref in get_version_sample_refs(beat_folder, version_file):
+            if ref not in results:
+                results[ref] = resolve_sample(ref) + ([],)
+            results[ref][2].append(version_file)
+    if save:
+        save_sample_index()
+    return results
+
+def analyze_library_samples():
+    missing = {}
+    try:
+        for beat in get_beat_folders():
+            count = sum(1 for status, _, _ in analyze_project_samples(beat, save=False).values() if status == "missing")
+            if count:
+                missing[beat] = count
+    finally:
+        save_sample_index()
+    return missing
+
+def collect_project_samples(beat_folder):
+    check_not_moving(beat_folder)
+    samples_path = beat_path(beat_folder, SAMPLES_DIR)
+    sources_path = os.path.join(samples_path, "sources.json")
+    os.makedirs(samples_path, exist_ok=True)
+    sources = {}
+    if os.path.exists(sources_path):
+        with open(sources_path, "r") as f:
+            sources = json.load(f)
+    collected_by_ref = {ref: name for name, ref in sources.items()}
+    collected = missing = 0
+    for ref, (status, resolved, _) in analyze_project_samples(beat_folder).items():
+        if status == "missing":
+            missing += 1
+            continue
+        if status == "builtin":
+            continue
+        name = collected_by_ref.get(ref)
+        if name is None:
+            name = ntpath.basename(resolved)
+            n = 1
+            while name in sources:
+                name = f"{n}_{ntpath.basename(resolved)}"
+                n += 1
+        target = os.path.join(samples_path, name)
+        if not os.path.exists(target) or os.path.getsize(target) != os.path.getsize(resolved):
+            shutil.copy2(resolved, target)
+        sources[name] = ref
+        collected += 1
+    write_json_atomic(sources_path, sources)
+    account_samples(beat_folder, _folder_size(samples_path))
+    save_checksum_catalog()
+    return collected, missing
+
 # === UI Update Functions ===
 def refresh_all():
     load_folders()
@@ -279,7 +1890,7 @@ def refresh_all():
     refresh_notes("")
     # Fix: Only select folder if it still exists
     global selected_folder
-    if selected_folder and os.path.exists(os.path.join("backups", selected_folder)):
+    if selected_folder in project_roots and os.path.exists(beat_path(selected_folder)):
         on_folder_select(selected_folder)
     else:
         selected_folder = None
@@ -330,9 +1941,10 @@ def update_folder_list(filtered_beats=None):
             btn.grid(row=0, column=1, sticky="ew", padx=(0, 2))
         else:
             # Beat name button with ellipsis for long names
+            label = folder if len(folder) <= 32 else folder[:29] + "..."
             btn = ctk.CTkButton(
                 folder_row,
-                text=folder if len(folder) <= 32 else folder[:29] + "...",
+                text=f"⇄ {label}" if folder in moving_projects else label,
                 width=180,
                 anchor="w",
                 font=("Bahnschrift", 12),
@@ -382,14 +1994,21 @@ def update_versions_list(folder, filtered_versions=None):
         version_row.grid_columnconfigure(1, weight=0)
         version_row.grid_columnconfigure(2, weight=0)
         is_present_version = version_file == f"{folder}.flp"
+        is_corrupt = get_integrity_status(folder, version_file) == "corrupt"
+        if is_corrupt:
+            fg_color, hover_color = "#8a2b2b", "#a33"
+        elif is_present_version:
+            fg_color, hover_color = "#2F8A3E", "#1b632d"
+        else:
+            fg_color, hover_color = None, None
 
         btn = ctk.CTkButton(
             version_row,
-            text=version_file,
+            text=f"⚠ {version_file}" if is_corrupt else version_file,
             font=("Bahnschrift", 12),
             anchor="w",
-            fg_color="#2F8A3E" if is_present_version else None,
-            hover_color="#1b632d" if is_present_version else None,
+            fg_color=fg_color,
+            hover_color=hover_color,
             command=lambda f=version_file: on_version_select(folder, f)
         )
         btn.grid(row=0, column=0, sticky="ew", padx=(5, 2))
@@ -423,10 +2042,13 @@ def update_versions_list(folder, filtered_versions=None):
 
 def load_folders():
     global beats_data_cache
+    invalidate_note_cache()
     beats_data_cache = load_all_beats_data()
     update_folder_list()
 
 def rename_beat(folder):
+    if project_busy(folder):
+        return
     dialog = ctk.CTkInputDialog(
         title="Rename Beat",
         text=f"Enter new name for '{folder}':"
@@ -434,15 +2056,19 @@ def rename_beat(folder):
     new_name = dialog.get_input()
     if not new_name or new_name == folder:
         return
-    old_folder_path = os.path.join("backups", folder)
-    new_folder_path = os.path.join("backups", new_name)
-    if os.path.exists(new_folder_path):
+    old_folder_path = beat_path(folder)
+    new_folder_path = os.path.join(get_project_root(folder), new_name)
+    if new_name in get_beat_folders() or os.path.exists(new_folder_path):
         messagebox.showerror("Error", f"A beat named '{new_name}' already exists.")
         return
     # Rename the folder
     os.rename(old_folder_path, new_folder_path)
+    with library_index_lock:
+        project_roots[new_name] = project_roots.pop(folder, get_project_root(folder))
     # Rename all files inside
     for filename in os.listdir(new_folder_path):
+        if filename in (NOTES_JOURNAL_FILE, SAMPLES_DIR):
+            continue
         old_file = os.path.join(new_folder_path, filename)
         # Replace old beat name with new in filenames
         new_file = os.path.join(
@@ -450,34 +2076,43 @@ def rename_beat(folder):
             filename.replace(folder, new_name, 1)
         )
         os.rename(old_file, new_file)
+    if os.path.exists(os.path.join(new_folder_path, NOTES_JOURNAL_FILE)):
+        compact_notes_journal(new_name, rename=lambda v: v.replace(folder, new_name, 1))
+    rename_checksums(folder, new_name)
     refresh_all()
     messagebox.showinfo("Renamed", f"'{folder}' has been renamed to '{new_name}'.")
 
 
 def confirm_delete_folder(folder):
+    if project_busy(folder):
+        return
     if messagebox.askyesno("Delete Project", f"Are you sure you want to delete '{folder}' and all its versions?"):
-        shutil.rmtree(os.path.join("backups", folder))
+        shutil.rmtree(beat_path(folder))
+        forget_checksums(folder)
         refresh_all()
 
 def confirm_delete_version(folder, version_file):
+    if project_busy(folder):
+        return
     if messagebox.askyesno("Delete Version", f"Delete version '{version_file}' and its notes?"):
-        os.remove(os.path.join("backups", folder, version_file))
-        txt_file = version_file.replace(".flp", ".txt")
-        txt_path = os.path.join("backups", folder, txt_file)
-        if os.path.exists(txt_path):
-            os.remove(txt_path)
+        os.remove(beat_path(folder, version_file))
+        forget_checksums(folder, version_file)
+        delete_notes_for_version(folder, version_file)
         on_folder_select(folder)
 
 def confirm_revert_version(folder, version_file):
+    if project_busy(folder):
+        return
     answer = messagebox.askyesno(
         "Revert to this version",
         f"Are you sure you want to revert the current version of '{folder}' to this backup?"
     )
     if answer:
         try:
-            backup_path = os.path.join("backups", folder, version_file)
-            present_path = os.path.join("backups", folder, f"{folder}.flp")
+            backup_path = beat_path(folder, version_file)
+            present_path = beat_path(folder, f"{folder}.flp")
             shutil.copy2(backup_path, present_path)
+            record_checksum(folder, f"{folder}.flp")
             messagebox.showinfo("Revert Successful", "The project has been reverted to the selected backup.")
             on_folder_select(folder)
         except Exception as e:
@@ -493,19 +2128,24 @@ def on_folder_select(folder):
     versions_search_var.set("")
     if folder:
         create_backup_btn.configure(state="normal")
+        export_bundle_btn.configure(state="normal")
+        samples_btn.configure(state="normal")
     else:
         create_backup_btn.configure(state="disabled")
+        export_bundle_btn.configure(state="disabled")
+        samples_btn.configure(state="disabled")
 
 def on_version_select(folder, version_file):
     global selected_version
     selected_version = (folder, version_file)
-    notes = get_notes_for_version(folder, version_file)
+    notes = get_cached_note(folder, version_file)
     note_display.configure(state="normal")
     note_display.delete("1.0", "end")
     note_display.insert("1.0", notes)
     note_display.configure(state="disabled")
     edit_note_btn.configure(state="normal")
     save_note_btn.configure(state="normal")
+    prefetch_adjacent_notes(folder, version_file)
 
     # --- Set version date label ---
     def format_datetime(dt):
@@ -516,18 +2156,26 @@ def on_version_select(folder, version_file):
         time_str = dt.strftime("%I:%M %p").lstrip("0")
         return f"{date_str} @ {time_str}"
 
+    info = beats_data_cache.get(folder)
+    if info and version_file in info["versions"]:
+        i = info["versions"].index(version_file)
+        timestamp, size_text = info["timestamps"][i], f" · {format_size(info['sizes'][i])}"
+    else:
+        timestamp, size_text = 0.0, ""
     if version_file == f"{folder}.flp":
-        file_path = os.path.join("backups", folder, version_file)
+        file_path = beat_path(folder, version_file)
         if os.path.exists(file_path):
             dt = datetime.fromtimestamp(os.path.getmtime(file_path))
             version_date_label.configure(text=f"Last updated: {format_datetime(dt)}")
         else:
             version_date_label.configure(text="Last updated: Unknown")
+    elif timestamp:
+        dt = datetime.fromtimestamp(timestamp)
+        version_date_label.configure(text=f"Version Date: {format_datetime(dt)}{size_text}")
     else:
-        match = re.search(r"_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2})", version_file)
-        if match:
-            dt = datetime.strptime(match.group(1), "%Y-%m-%d_%H-%M")
-            version_date_label.configure(text=f"Version Date: {format_datetime(dt)}")
+        dt = extract_timestamp(version_file)
+        if dt != datetime.min:
+            version_date_label.configure(text=f"Version Date: {format_datetime(dt)}{size_text}")
         else:
             version_date_label.configure(text="Version Date: Unknown")
 
@@ -538,24 +2186,43 @@ def save_note_edits():
     if not selected_version:
         return
     folder, version_file = selected_version
-    note_path = os.path.join("backups", folder, version_file.replace(".flp", ".txt"))
-    with open(note_path, "w") as f:
-        content = note_display.get("1.0", "end").strip()
-        f.write(content)
+    if project_busy(folder):
+        return
+    set_notes_for_version(folder, version_file, note_display.get("1.0", "end").strip())
     note_display.configure(state="disabled")
     save_note_btn.configure(text="✅ Saved!", fg_color="#2ea043", hover=False)
     app.after(2000, lambda: save_note_btn.configure(text="💾 Save", fg_color=original_save_fg, hover=True))
     refresh_all()
 
 def on_beats_search(*args):
+    # Note contents are read from disk rather than held in memory, so wait for a pause in typing.
+    global beats_search_job, beats_search_generation
+    beats_search_generation += 1
+    if beats_search_job:
+        app.after_cancel(beats_search_job)
+    beats_search_job = app.after(250, run_beats_search)
+
+def run_beats_search():
+    # Reading notes across the library runs off the UI thread; a newer keystroke bumps the
+    # generation, which stops the old search and discards its results.
+    global beats_search_job
+    beats_search_job = None
     query = beats_search_var.get().strip()
     if not query:
         update_folder_list()
-    else:
-        filtered = filter_beats(query)
+        return
+    generation = beats_search_generation
+    def show_results(filtered):
+        if generation != beats_search_generation:
+            return
         update_folder_list(filtered)
         update_versions_list(None)
         refresh_notes("")
+    def search_task():
+        filtered = filter_beats(query, cancelled=lambda: generation != beats_search_generation)
+        if filtered is not None:
+            app.after(0, lambda: show_results(filtered))
+    threading.Thread(target=search_task, daemon=True).start()
 
 def on_versions_search(*args):
     query = versions_search_var.get().strip()
@@ -681,19 +2348,21 @@ def upload_flp():
         return
     filename = os.path.basename(flp_path)
     beat_name = os.path.splitext(filename)[0]
-    beat_folder = os.path.join("backups", beat_name)
+    if project_busy(beat_name):
+        return
+    beat_folder = new_project_path(beat_name)
     os.makedirs(beat_folder, exist_ok=True)
     present_flp_path = os.path.join(beat_folder, f"{beat_name}.flp")
     if not os.path.exists(present_flp_path):
         shutil.copy2(flp_path, present_flp_path)
+        record_checksum(beat_name, f"{beat_name}.flp")
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
     new_flp_name = f"{beat_name}_{timestamp}.flp"
     new_flp_path = os.path.join(beat_folder, new_flp_name)
     shutil.copy2(flp_path, new_flp_path)
+    record_checksum(beat_name, new_flp_name)
     def save_notes(notes):
-        note_path = os.path.join(beat_folder, f"{beat_name}_{timestamp}.txt")
-        with open(note_path, "w") as f:
-            f.write(notes if notes else "")
+        set_notes_for_version(beat_name, new_flp_name, notes if notes else "")
         refresh_all()
     themed_note_popup(save_notes)
 
@@ -706,37 +2375,18 @@ def scan_for_flps():
     def from_drive():
         popup.destroy()
         try:
-            gauth = GoogleAuth()
-            gauth.LocalWebserverAuth()
-            drive = GoogleDrive(gauth)
-            folder_list = drive.ListFile({
-                'q': "mimeType='application/vnd.google-apps.folder' and trashed=false and title='FLowTrack Projects'"
-            }).GetList()
-            if not folder_list:
+            drive = get_drive()
+            manifest = load_drive_manifest()
+            refresh_remote_state(drive, manifest)
+            if not manifest["root_id"]:
                 messagebox.showinfo("Not Found", "No 'FLowTrack Projects' folder found in your Google Drive.")
                 return
-            flowtrack_folder = folder_list[0]
-            flowtrack_folder_id = flowtrack_folder['id']
-            beat_folders = drive.ListFile({
-                'q': f"'{flowtrack_folder_id}' in parents and trashed=false and mimeType='application/vnd.google-apps.folder'"
-            }).GetList()
-            imported = 0
-            for beat_folder in beat_folders:
-                beat_name = beat_folder['title']
-                beat_folder_id = beat_folder['id']
-                beat_files = drive.ListFile({
-                    'q': f"'{beat_folder_id}' in parents and trashed=false"
-                }).GetList()
-                local_beat_folder = os.path.join("backups", beat_name)
-                os.makedirs(local_beat_folder, exist_ok=True)
-                for file in beat_files:
-                    if file['title'].endswith('.flp') or file['title'].endswith('.txt'):
-                        local_path = os.path.join(local_beat_folder, file['title'])
-                        file.GetContentFile(local_path)
-                        imported += 1
-            messagebox.showinfo("Scan Complete", f"Imported {imported} files from Google Drive.")
+            plan = plan_drive_sync(manifest, set(manifest["folders"]), push=False)
+            execute_drive_sync(drive, manifest, plan)
+            messagebox.showinfo("Scan Complete", describe_sync_plan(plan))
             refresh_all()
         except Exception as e:
+            reset_drive_session()
             messagebox.showerror("Google Drive Error", str(e))
     
     def from_local():
@@ -761,10 +2411,15 @@ def scan_for_flps():
                 if not found_flps:
                     app.after(0, lambda: messagebox.showinfo("Scan Complete", "No .flp files found in selected folder."))
                     return
+                busy = set()
+                added = 0
                 for flp_path in found_flps:
                     filename = os.path.basename(flp_path)
                     beat_name = os.path.splitext(filename)[0]
-                    beat_folder = os.path.join("backups", beat_name)
+                    if beat_name in moving_projects:
+                        busy.add(beat_name)
+                        continue
+                    beat_folder = new_project_path(beat_name)
                     os.makedirs(beat_folder, exist_ok=True)
                     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
                     new_flp_name = f"{beat_name}_{timestamp}.flp"
@@ -773,15 +2428,21 @@ def scan_for_flps():
                     # Also copy as present version (beatname.flp)
                     present_flp_path = os.path.join(beat_folder, f"{beat_name}.flp")
                     shutil.copy2(flp_path, present_flp_path)
+                    record_checksum(beat_name, new_flp_name, save=False)
+                    record_checksum(beat_name, f"{beat_name}.flp", save=False)
                     note_filename = filename.replace(".flp", ".txt")
-                    note_path = os.path.join(beat_folder, new_flp_name.replace(".flp", ".txt"))
                     # If a matching note exists, copy it; otherwise, create a default note
                     if note_filename in found_notes:
-                        shutil.copy2(found_notes[note_filename], note_path)
+                        with open(found_notes[note_filename], "r") as f:
+                            set_notes_for_version(beat_name, new_flp_name, f.read())
                     else:
-                        with open(note_path, "w") as f:
-                            f.write("(Scanned version - no notes)")
-                app.after(0, lambda: messagebox.showinfo("Scan Complete", f"Added {len(found_flps)} FLP files to your project backups!"))
+                        set_notes_for_version(beat_name, new_flp_name, "(Scanned version - no notes)")
+                    added += 1
+                save_checksum_catalog()
+                message = f"Added {added} FLP files to your project backups!"
+                if busy:
+                    message += f"\n\nSkipped projects being moved to another library: {', '.join(sorted(busy))}"
+                app.after(0, lambda: messagebox.showinfo("Scan Complete", message))
                 app.after(0, refresh_all)
             except Exception as e:
                 app.after(0, lambda: messagebox.showerror("Scan Error", f"An error occurred during scan:\n{e}"))
@@ -792,6 +2453,421 @@ def scan_for_flps():
     ctk.CTkButton(btn_frame, text="📂 Choose from local files", command=from_local, width=180, font=("Bahnschrift", 13)).pack(side="left", padx=8)
     popup.protocol("WM_DELETE_WINDOW", popup.destroy)
 
+def export_bundle(folder):
+    if not folder:
+        return
+    bundle_path = filedialog.asksaveasfilename(
+        title="Export Project Bundle",
+        initialfile=f"{folder}{BUNDLE_EXTENSION}",
+        defaultextension=BUNDLE_EXTENSION,
+        filetypes=[("FLowTrack Bundle", f"*{BUNDLE_EXTENSION}")]
+    )
+    if not bundle_path:
+        return
+    export_bundle_btn.configure(state="disabled", text="Exporting...")
+    progress_bar.set(0)
+    progress_bar.pack(pady=(0, 10))
+    def export_task():
+        try:
+            count = export_project_bundle(
+                folder, bundle_path,
+                progress=lambda p: app.after(0, lambda: progress_bar.set(p))
+            )
+            app.after(0, lambda: messagebox.showinfo("Export Complete", f"Exported {count} versions of '{folder}'."))
+        except Exception as e:
+            app.after(0, lambda err=e: messagebox.showerror("Export Error", f"Failed to export project:\n{err}"))
+        finally:
+            app.after(0, lambda: (
+                progress_bar.pack_forget(),
+                export_bundle_btn.configure(state="normal" if selected_folder else "disabled", text="📦 Export Project")
+            ))
+    threading.Thread(target=export_task, daemon=True).start()
+
+def import_bundle():
+    bundle_path = filedialog.askopenfilename(
+        title="Import Project Bundle",
+        filetypes=[("FLowTrack Bundle", f"*{BUNDLE_EXTENSION}")]
+    )
+    if not bundle_path:
+        return
+    try:
+        index = read_bundle_index(bundle_path)
+    except Exception as e:
+        messagebox.showerror("Import Error", str(e))
+        return
+    popup = ctk.CTkToplevel(app)
+    popup.title("📥 Import Bundle")
+    popup.geometry("460x420")
+    popup.configure(fg_color="#2a2a2a")
+    popup.grab_set()
+    ctk.CTkLabel(popup, text=f"Versions of '{index['project']}' to import:", font=("Bahnschrift", 14)).pack(pady=(18, 8))
+    entry_list = ctk.CTkScrollableFrame(popup)
+    entry_list.pack(padx=20, fill="both", expand=True)
+    entry_vars = {}
+    for entry in index["entries"]:
+        var = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            entry_list,
+            text=f"{entry['name']}  ({entry['size'] / (1024 * 1024):.1f} MB)",
+            variable=var,
+            font=("Bahnschrift", 12)
+        ).pack(anchor="w", padx=5, pady=2)
+        entry_vars[entry["name"]] = var
+    def start_import():
+        selected_names = {name for name, var in entry_vars.items() if var.get()}
+        popup.destroy()
+        if not selected_names:
+            return
+        import_bundle_btn.configure(state="disabled", text="Importing...")
+        progress_bar.set(0)
+        progress_bar.pack(pady=(0, 10))
+        def import_task():
+            try:
+                beat, imported, skipped = import_project_bundle(
+                    bundle_path, selected_names,
+                    progress=lambda p: app.after(0, lambda: progress_bar.set(p))
+                )
+                app.after(0, lambda: messagebox.showinfo(
+                    "Import Complete",
+                    f"Imported {imported} versions into '{beat}'.\nSkipped {skipped} already present."
+                ))
+                app.after(0, refresh_all)
+            except Exception as e:
+                app.after(0, lambda err=e: messagebox.showerror("Import Error", f"Failed to import bundle:\n{err}"))
+            finally:
+                app.after(0, lambda: (
+                    progress_bar.pack_forget(),
+                    import_bundle_btn.configure(state="normal", text="📥 Import Bundle")
+                ))
+        threading.Thread(target=import_task, daemon=True).start()
+    ctk.CTkButton(popup, text="Import Selected", command=start_import, font=("Bahnschrift", 13)).pack(pady=15)
+
+def run_scrub(full=False, on_done=None):
+    if not scrub_running.acquire(blocking=False):
+        return False
+    def scrub_task():
+        try:
+            flagged = scrub_library(full=full)
+            if on_done:
+                app.after(0, lambda: on_done(flagged, None))
+        except Exception as e:
+            if on_done:
+                app.after(0, lambda err=e: on_done(None, err))
+        finally:
+            scrub_running.release()
+            app.after(0, lambda: update_versions_list(selected_folder) if selected_folder else None)
+    threading.Thread(target=scrub_task, daemon=True).start()
+    return True
+
+def schedule_scrub():
+    last_full_pass = load_checksum_catalog().get("last_full_pass", 0)
+    run_scrub(full=time.time() - last_full_pass > SCRUB_FULL_PASS_SECONDS)
+    app.after(SCRUB_INTERVAL_MS, schedule_scrub)
+
+def verify_backups():
+    def on_done(flagged, err):
+        verify_btn.configure(state="normal", text="🛡 Verify Backups")
+        if err:
+            messagebox.showerror("Verify Error", f"Verification failed:\n{err}")
+        elif flagged:
+            shown = "\n".join(flagged[:15]) + ("\n..." if len(flagged) > 15 else "")
+            messagebox.showwarning("Verify Complete", f"{len(flagged)} damaged versions or note journals found:\n\n{shown}")
+        else:
+            messagebox.showinfo("Verify Complete", "All backups passed verification.")
+    if run_scrub(full=True, on_done=on_done):
+        verify_btn.configure(state="disabled", text="Verifying...")
+    else:
+        messagebox.showinfo("Verify", "A verification pass is already running. Try again shortly.")
+
+def show_storage_dashboard():
+    with checksum_catalog_lock:
+        usage = load_storage_usage()
+        library_total = usage["library_total"]
+        version_count = usage["version_count"]
+        project_count = len(usage["projects"])
+        dedup_reclaimable = usage["dedup_reclaimable"]
+        retention_reclaimable = usage["retention_reclaimable"]
+        keep = usage["retention_keep"]
+        since = datetime.now().timestamp() - 90 * 86400
+        history = [
+            (day, total) for day, total in
+            ((datetime.strptime(d, "%Y-%m-%d").timestamp(), t) for d, t in usage["history"][-90:])
+            if day >= since
+        ]
+    largest = get_largest_projects()
+
+    popup = ctk.CTkToplevel(app)
+    popup.title("📊 Storage")
+    popup.geometry("520x600")
+    popup.configure(fg_color="#2a2a2a")
+    ctk.CTkLabel(popup, text=f"Library: {format_size(library_total)}", font=("Bahnschrift", 18, "bold")).pack(pady=(18, 2))
+    ctk.CTkLabel(
+        popup,
+        text=f"{project_count} projects · {version_count} versions",
+        font=("Bahnschrift", 12),
+        text_color="#cccccc"
+    ).pack()
+    ctk.CTkLabel(
+        popup,
+        text=f"Duplicate versions: {format_size(dedup_reclaimable)} reclaimable\n"
+             f"Keeping the newest {keep} backups per project: {format_size(retention_reclaimable)} reclaimable",
+        font=("Bahnschrift", 12),
+        justify="left"
+    ).pack(pady=(10, 6))
+
+    ctk.CTkLabel(popup, text="Growth (last 90 days)", font=("Bahnschrift", 14, "bold")).pack(pady=(8, 2))
+    chart = ctk.CTkCanvas(popup, width=460, height=120, bg="#1e1e1e", highlightthickness=0)
+    chart.pack(padx=20)
+    if len(history) >= 2:
+        # Points sit at their dates; the total holds until the next recorded day, so quiet
+        # stretches show as flat runs.
+        peak = max(total for _, total in history) or 1
+        first_day, span = history[0][0], (history[-1][0] - history[0][0]) or 1
+        points = []
+        for day, total in history:
+            x, y = 10 + (day - first_day) / span * 440, 110 - total / peak * 100
+            if points:
+                points += [x, points[-1]]
+            points += [x, y]
+        chart.create_line(*points, fill="#2F8A3E", width=2)
+        chart.create_text(12, 8, text=format_size(peak), fill="#888888", anchor="nw")
+    else:
+        chart.create_text(230, 60, text="Not enough history yet", fill="#888888")
+
+    ctk.CTkLabel(popup, text="Largest projects", font=("Bahnschrift", 14, "bold")).pack(pady=(14, 2))
+    project_list = ctk.CTkScrollableFrame(popup)
+    project_list.pack(padx=20, pady=(0, 15), fill="both", expand=True)
+    project_list.grid_columnconfigure(1, weight=1)
+    biggest = largest[0][0] if largest else 1
+    for row, (total, beat) in enumerate(largest):
+        ctk.CTkLabel(project_list, text=beat if len(beat) <= 24 else beat[:21] + "...", font=("Bahnschrift", 12), anchor="w", width=160).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        bar = ctk.CTkProgressBar(project_list)
+        bar.set(total / biggest if biggest else 0)
+        bar.grid(row=row, column=1, sticky="ew", padx=5)
+        ctk.CTkLabel(project_list, text=format_size(total), font=("Bahnschrift", 12), width=70, anchor="e").grid(row=row, column=2, padx=5)
+
+def show_sample_dependencies(folder):
+    if not folder:
+        return
+    popup = ctk.CTkToplevel(app)
+    popup.title(f"🎧 Samples - {folder}")
+    popup.geometry("620x520")
+    popup.configure(fg_color="#2a2a2a")
+    summary_label = ctk.CTkLabel(popup, text="Reading project files...", font=("Bahnschrift", 14), justify="left")
+    summary_label.pack(pady=(18, 8))
+    sample_list = ctk.CTkScrollableFrame(popup)
+    sample_list.pack(padx=20, fill="both", expand=True)
+    btn_frame = ctk.CTkFrame(popup, fg_color="transparent")
+    btn_frame.pack(pady=15)
+    status_colors = {"missing": "#e06c6c", "relocated": "#D4AF37", "found": "#9ccc9c", "builtin": "#888888"}
+
+    def run_in_background(task, on_done, busy_text):
+        summary_label.configure(text=busy_text)
+        for button in btn_frame.winfo_children():
+            button.configure(state="disabled")
+        def worker():
+            try:
+                result = task()
+                app.after(0, lambda: on_done(result))
+            except Exception as e:
+                app.after(0, lambda err=e: messagebox.showerror("Samples Error", str(err), parent=popup))
+            finally:
+                app.after(0, lambda: [b.configure(state="normal") for b in btn_frame.winfo_children()] if popup.winfo_exists() else None)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def show_results(results):
+        if not popup.winfo_exists():
+            return
+        for widget in sample_list.winfo_children():
+            widget.destroy()
+        counts = {status: 0 for status in status_colors}
+        for status, _, _ in results.values():
+            counts[status] += 1
+        summary_label.configure(
+            text=f"{len(results)} samples referenced · {counts['found']} found · "
+                 f"{counts['relocated']} found in libraries · {counts['missing']} missing"
+        )
+        order = {"missing": 0, "relocated": 1, "found": 2, "builtin": 3}
+        for ref, (status, resolved, versions) in sorted(results.items(), key=lambda item: order[item[1][0]]):
+            text = ref if status != "relocated" else f"{ref}\n  → {resolved}"
+            ctk.CTkLabel(
+                sample_list, text=f"[{status}] {text}", font=("Bahnschrift", 11),
+                text_color=status_colors[status], anchor="w", justify="left"
+            ).pack(fill="x", padx=5, pady=1)
+
+    def refresh():
+        run_in_background(lambda: analyze_project_samples(folder), show_results, "Reading project files...")
+
+    def add_library():
+        library = filedialog.askdirectory(title="Select Sample Library Folder", parent=popup)
+        if not library:
+            return
+        libraries = load_config().get("sample_libraries", [])
+        if library not in libraries:
+            save_config(sample_libraries=libraries + [library])
+        rescan()
+
+    def rescan():
+        def task():
+            update_sample_index()
+            return analyze_project_samples(folder)
+        run_in_background(task, show_results, "Indexing sample libraries...")
+
+    def collect():
+        def on_collected(result):
+            collected, missing = result
+            messagebox.showinfo(
+                "Collect Samples",
+                f"Copied {collected} samples into '{folder}/{SAMPLES_DIR}'." + (f"\n{missing} samples could not be found." if missing else ""),
+                parent=popup
+            )
+            refresh()
+        run_in_background(lambda: collect_project_samples(folder), on_collected, "Collecting samples...")
+
+    def check_library():
+        def on_checked(missing):
+            if not missing:
+                messagebox.showinfo("Library Check", "Every project's samples were found.", parent=popup)
+                return
+            worst = sorted(missing.items(), key=lambda item: -item[1])
+            lines = "\n".join(f"{beat}: {count}" for beat, count in worst[:15])
+            more = "\n..." if len(worst) > 15 else ""
+            messagebox.showwarning("Library Check", f"Projects with missing samples:\n\n{lines}{more}", parent=popup)
+            refresh()
+        run_in_background(analyze_library_samples, on_checked, "Checking every project...")
+
+    ctk.CTkButton(btn_frame, text="➕ Add Sample Library", command=add_library, width=150, font=("Bahnschrift", 13)).pack(side="left", padx=5)
+    ctk.CTkButton(btn_frame, text="🔄 Rescan", command=rescan, width=90, font=("Bahnschrift", 13)).pack(side="left", padx=5)
+    ctk.CTkButton(btn_frame, text="📥 Collect Samples", command=collect, width=140, font=("Bahnschrift", 13)).pack(side="left", padx=5)
+    ctk.CTkButton(btn_frame, text="🔍 Check All Projects", command=check_library, width=150, font=("Bahnschrift", 13)).pack(side="left", padx=5)
+    refresh()
+
+def use_notes_journal():
+    if notes_journal_enabled():
+        question = "Notes are already kept in a journal per project.\n\nMove any loose .txt notes into the journals and compact them now?"
+    else:
+        question = "Store notes in one journal file per project instead of one .txt per version?\n\nExisting notes will be moved into the journals."
+    if not messagebox.askyesno("Notes Journal", question):
+        return
+    journal_btn.configure(state="disabled", text="Migrating...")
+    def migrate_task():
+        try:
+            migrated = migrate_library_to_journal()
+            app.after(0, lambda: messagebox.showinfo("Notes Journal", f"Moved {migrated} note files into project journals."))
+            app.after(0, refresh_all)
+        except Exception as e:
+            app.after(0, lambda err=e: messagebox.showerror("Notes Journal Error", f"Failed to migrate notes:\n{err}"))
+        finally:
+            app.after(0, lambda: journal_btn.configure(state="normal", text="🗒 Notes Journal"))
+    threading.Thread(target=migrate_task, daemon=True).start()
+
+def show_libraries():
+    popup = ctk.CTkToplevel(app)
+    popup.title("🗄 Libraries")
+    popup.geometry("560x440")
+    popup.configure(fg_color="#2a2a2a")
+    ctk.CTkLabel(popup, text="Library Roots", font=("Bahnschrift", 18, "bold")).pack(pady=(18, 2))
+    ctk.CTkLabel(popup, text="New projects are created in the primary library.", font=("Bahnschrift", 12), text_color="#cccccc").pack()
+    root_list = ctk.CTkScrollableFrame(popup)
+    root_list.pack(padx=20, pady=10, fill="both", expand=True)
+    root_list.grid_columnconfigure(0, weight=1)
+    move_frame = ctk.CTkFrame(popup, fg_color="transparent")
+    move_frame.pack(pady=(0, 8))
+    btn_frame = ctk.CTkFrame(popup, fg_color="transparent")
+    btn_frame.pack(pady=(0, 15))
+    target_var = ctk.StringVar()
+
+    def refresh():
+        if not popup.winfo_exists():
+            return
+        for widget in root_list.winfo_children():
+            widget.destroy()
+        roots = get_library_roots()
+        beats = scan_library_roots()
+        with checksum_catalog_lock:
+            projects = load_storage_usage()["projects"]
+        with library_index_lock:
+            online = [root for root in roots if root not in offline_roots]
+        for row, root in enumerate(roots):
+            if root not in online:
+                ctk.CTkLabel(
+                    root_list, text=f"{os.path.abspath(root)}\nNot connected",
+                    font=("Bahnschrift", 12), anchor="w", justify="left", text_color="#888888"
+                ).grid(row=row, column=0, sticky="w", padx=5, pady=4)
+                ctk.CTkLabel(root_list, text="Offline", font=("Bahnschrift", 12, "bold"), text_color="#e06c6c", width=110).grid(row=row, column=1, padx=5)
+                continue
+            owned = [beat for beat, beat_root in beats.items() if beat_root == root]
+            total = sum(projects.get(beat, {}).get("total", 0) for beat in owned)
+            ctk.CTkLabel(
+                root_list, text=f"{os.path.abspath(root)}\n{len(owned)} projects · {format_size(total)}",
+                font=("Bahnschrift", 12), anchor="w", justify="left"
+            ).grid(row=row, column=0, sticky="w", padx=5, pady=4)
+            if row == 0:
+                ctk.CTkLabel(root_list, text="Primary", font=("Bahnschrift", 12, "bold"), text_color="#2F8A3E", width=110).grid(row=row, column=1, padx=5)
+            else:
+                ctk.CTkButton(
+                    root_list, text="Make Primary", width=110, font=("Bahnschrift", 12),
+                    command=lambda r=root: make_primary(r)
+                ).grid(row=row, column=1, padx=5)
+        target_menu.configure(values=online)
+        if target_var.get() not in online:
+            target_var.set(online[-1] if online else "")
+
+    def add_root():
+        folder = filedialog.askdirectory(title="Choose a folder for a new library", parent=popup)
+        if not folder:
+            return
+        roots = get_library_roots()
+        if any(os.path.abspath(folder) == os.path.abspath(root) for root in roots):
+            messagebox.showinfo("Libraries", "That folder is already a library.", parent=popup)
+            return
+        save_config(library_roots=roots + [folder])
+        refresh()
+        refresh_all()
+
+    def make_primary(root):
+        roots = get_library_roots()
+        save_config(library_roots=[root] + [r for r in roots if r != root])
+        refresh()
+        refresh_all()
+
+    def move_selected():
+        folder = selected_folder
+        if not folder:
+            messagebox.showinfo("Libraries", "Select a project to move first.", parent=popup)
+            return
+        if project_busy(folder):
+            return
+        target = target_var.get()
+        if not target:
+            return
+        if os.path.abspath(get_project_root(folder)) == os.path.abspath(target):
+            messagebox.showinfo("Libraries", f"'{folder}' is already in that library.", parent=popup)
+            return
+        moving_projects.add(folder)
+        move_btn.configure(state="disabled", text="Moving...")
+        update_folder_list()
+        def move_task():
+            try:
+                move_project(folder, target)
+                app.after(0, lambda: messagebox.showinfo("Libraries", f"Moved '{folder}' to {target}."))
+            except Exception as e:
+                moving_projects.discard(folder)
+                app.after(0, lambda err=e: messagebox.showerror("Move Error", f"Failed to move '{folder}':\n{err}"))
+            finally:
+                app.after(0, lambda: move_btn.configure(state="normal", text="⇄ Move") if move_btn.winfo_exists() else None)
+                app.after(0, refresh)
+                app.after(0, refresh_all)
+        threading.Thread(target=move_task, daemon=True).start()
+
+    ctk.CTkLabel(move_frame, text="Move selected project to:", font=("Bahnschrift", 13)).pack(side="left", padx=5)
+    target_menu = ctk.CTkOptionMenu(move_frame, variable=target_var, values=[], width=200, font=("Bahnschrift", 12))
+    target_menu.pack(side="left", padx=5)
+    move_btn = ctk.CTkButton(move_frame, text="⇄ Move", command=move_selected, width=90, font=("Bahnschrift", 13))
+    move_btn.pack(side="left", padx=5)
+    ctk.CTkButton(btn_frame, text="➕ Add Library", command=add_root, width=150, font=("Bahnschrift", 13)).pack(side="left", padx=5)
+    refresh()
+
 button_bar = ctk.CTkFrame(app, fg_color="transparent")
 button_bar.pack(pady=(0, 15))
 create_btn = ctk.CTkButton(button_bar, text="✨ Create New Project", font=("Bahnschrift", 13), command=create_new_project)
@@ -856,6 +2932,32 @@ create_backup_btn = ctk.CTkButton(
     command=lambda: create_new_backup(selected_folder)
 )
 create_backup_btn.grid(row=0, column=3, padx=10)
+export_bundle_btn = ctk.CTkButton(
+    button_bar,
+    text="📦 Export Project",
+    font=("Bahnschrift", 13),
+    state="disabled",
+    command=lambda: export_bundle(selected_folder)
+)
+export_bundle_btn.grid(row=1, column=0, padx=10, pady=(8, 0))
+import_bundle_btn = ctk.CTkButton(button_bar, text="📥 Import Bundle", font=("Bahnschrift", 13), command=import_bundle)
+import_bundle_btn.grid(row=1, column=1, padx=10, pady=(8, 0))
+verify_btn = ctk.CTkButton(button_bar, text="🛡 Verify Backups", font=("Bahnschrift", 13), command=verify_backups)
+verify_btn.grid(row=1, column=2, padx=10, pady=(8, 0))
+journal_btn = ctk.CTkButton(button_bar, text="🗒 Notes Journal", font=("Bahnschrift", 13), command=use_notes_journal)
+journal_btn.grid(row=1, column=3, padx=10, pady=(8, 0))
+storage_btn = ctk.CTkButton(button_bar, text="📊 Storage", font=("Bahnschrift", 13), command=show_storage_dashboard)
+storage_btn.grid(row=1, column=4, padx=10, pady=(8, 0))
+samples_btn = ctk.CTkButton(
+    button_bar,
+    text="🎧 Samples",
+    font=("Bahnschrift", 13),
+    state="disabled",
+    command=lambda: show_sample_dependencies(selected_folder)
+)
+samples_btn.grid(row=1, column=5, padx=10, pady=(8, 0))
+libraries_btn = ctk.CTkButton(button_bar, text="🗄 Libraries", font=("Bahnschrift", 13), command=show_libraries)
+libraries_btn.grid(row=1, column=6, padx=10, pady=(8, 0))
 
 # --- Bindings ---
 beats_search_var.trace_add("write", on_beats_search)
@@ -863,4 +2965,5 @@ versions_search_var.trace_add("write", on_versions_search)
 
 # --- Main ---
 load_folders()
+app.after(60 * 1000, schedule_scrub)
 app.mainloop()
\ No newline at end of file